@@ -4,67 +4,85 @@ End-to-end demo – Phase-1 (Excel info) + Phase-2 (type detection)
 PERFORMANCE OPTIMIZED VERSION WITH FIXES
 """
 
-import sys
+import os
+import atexit
 import pandas as pd
 from pathlib import Path
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 import time
 from typing import List, Dict, Tuple
 
-sys.path.append(str(Path(__file__).resolve().parent.parent))
-
 from src.core.excel_processor import ExcelProcessor
 from src.core.type_detector import TypeDetector
 from src.core.format_parser import FormatParser
 from src.core.data_storage import DataStorage
+from src.core._prepared import prepared_ledger
+
+# Query bounds, built once rather than per call
+_DEC_5K = Decimal("5000")
+_DEC_100K = Decimal("100000")
+
+# (message, elapsed ns) per timed call, printed once at exit
+_TIMINGS: List[Tuple[str, int]] = []
 
 def timed(message):
     def decorator(func):
         def wrapper(*args, **kwargs):
-            start = time.time()
+            start = time.perf_counter_ns()
             result = func(*args, **kwargs)
-            end = time.time()
-            print(f"\n⏱️  {message} took: {end - start:.4f} seconds")
+            _TIMINGS.append((message, time.perf_counter_ns() - start))
             return result
         return wrapper
     return decorator
 
+@atexit.register
+def _print_timings():
+    if not _TIMINGS:
+        return
+    print("\n⏱️  Timings")
+    for message, elapsed_ns in _TIMINGS:
+        print(f"   {message:<40} {elapsed_ns * 1e-9:.6f} seconds")
+
 @timed("Phase-1: Excel info extraction")
-def phase1_excel_info(file_list: List[str]) -> Tuple[ExcelProcessor, Dict]:
+def phase1_excel_info(file_list: List[str]) -> Tuple[ExcelProcessor, Dict, Dict]:
     ep = ExcelProcessor()
-    ep.load_files(file_list)  # This now loads and parses all data
+    # Later phases only look at the first 500 rows of each sheet
+    ep.load_files(file_list, max_rows_hint=500)
     
-    # Get sheet info (now includes dtypes)
+    # Sheet metadata comes from header rows and dimensions; sheets stay unparsed
     info = ep.get_sheet_info()
     
     # Print file info
+    previews = {}
     for file_path, sheets in info.items():
         print(f"\n📁 File: {file_path}")
         for sheet_name, sheet_info in sheets.items():
             print(f"   📄 Sheet: {sheet_name}  rows={sheet_info['rows']}  cols={sheet_info['cols']}")
             
-            # Get preview using the fixed preview_data method
-            preview = ep.preview_data(file_path, sheet_name, rows=3)
+            # Materialize the preview once; Phase-2 reuses it for type detection
+            preview = ep.preview_data(file_path, sheet_name, rows=200)
+            previews[(file_path, sheet_name)] = preview
             print("      preview:")
-            print(preview.to_string())
+            print(preview.head(3).to_string())
             print("-"*60)
     
-    return ep, info
+    return ep, info, previews
 
 @timed("Phase-2: Type detection")
-def phase2_type_detection(ep, info):
+def phase2_type_detection(previews):
     print("\n" + "=" * 70)
     print("PHASE-2  –  Column type detection")
     print("=" * 70)
 
-    for file_path, sheets in info.items():
-        for sheet, _ in sheets.items():
-            df_preview = ep.preview_data(file_path, sheet, rows=200)
-            results = TypeDetector.detect_all(df_preview)
+    # Sheets are independent, so detect them in parallel and print afterwards
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        all_results = list(ex.map(TypeDetector.detect_all, previews.values()))
 
-            print(f"\n📊 {Path(file_path).name}  |  sheet: {sheet}")
-            for col, (dtype, conf) in results.items():
-                print(f"   {col:<35}  ->  {dtype:<8}  ({conf:.2f})")
+    for (file_path, sheet), results in zip(previews.keys(), all_results):
+        print(f"\n📊 {Path(file_path).name}  |  sheet: {sheet}")
+        for col, (dtype, conf) in results.items():
+            print(f"   {col:<35}  ->  {dtype:<8}  ({conf:.2f})")
 
 @timed("Phase-3: FormatParser tests")
 def phase3_format_parser_tests():
@@ -77,14 +95,16 @@ def phase3_format_parser_tests():
     test_dates = ["12/31/2023", "31/12/2023", "2023-12-31", "31-Dec-2023", 
                  "Q1-24", "Quarter 1 2024", "Mar 2024", "March 2024", "44927"]
 
+    # Parse each list in a single batched call; loop only to print
+    parsed_amounts = FormatParser.parse_amount_decimal(pd.Series(test_amounts))
+    parsed_dates = FormatParser.parse_date_vectorized(pd.Series(test_dates))
+
     # Amount parsing
-    for val in test_amounts:
-        parsed = FormatParser.parse_amount(val)
+    for val, parsed in zip(test_amounts, parsed_amounts):
         print(f"{val:<15} -> {parsed}")
 
     # Date parsing
-    for val in test_dates:
-        parsed = FormatParser.parse_date(val)
+    for val, parsed in zip(test_dates, parsed_dates):
         print(f"{val:<18} -> {parsed}")
 
 @timed("Phase-4: DataStorage operations")
@@ -93,25 +113,13 @@ def phase4_datastorage_demo(ep, ledger_file):
     print("PHASE-4  –  DataStorage demo")
     print("=" * 70)
 
-    sheet = ep._workbooks[ledger_file].sheet_names[0]
-    
-    # Load only necessary columns
-    columns_to_load = ["Posting Date", "Amount", "Currency Code", "Customer Name"]
-    df_demo = ep.preview_data(ledger_file, sheet, rows=500, columns=columns_to_load)
+    sheet = ep.first_sheet(ledger_file)
     
-    # Clean column names
-    df_demo.columns = [col.lower().replace(" ", "_") for col in df_demo.columns]
-    print(f"Loaded {len(df_demo)} records")
-
-    # Parse amounts and dates
+    # Load only necessary columns, then parse amounts/dates and drop invalid rows
     print("\nParsing amounts and dates...")
-    df_demo["amount_num"] = FormatParser.parse_amount_vectorized(df_demo["amount"])
-    df_demo["posting_date"] = pd.to_datetime(df_demo["posting_date"], errors="coerce")
-
-    # Clean data
-    initial_count = len(df_demo)
-    df_demo = df_demo.dropna(subset=["amount_num", "posting_date"])
-    print(f"Cleaned data: {initial_count} -> {len(df_demo)} valid records")
+    columns_to_load = ["Posting Date", "Amount", "Currency Code", "Customer Name"]
+    df_demo = prepared_ledger(ep, ledger_file, sheet, rows=500, columns=columns_to_load)
+    print(f"Prepared {len(df_demo)} valid records")
 
     # Store data
     print("Storing data...")
@@ -120,16 +128,20 @@ def phase4_datastorage_demo(ep, ledger_file):
         name="ledger",
         df=df_demo,
         column_types={"amount_num": "number", "posting_date": "datetime"},
-        index_cols=["posting_date", "amount_num"]  # Add index for performance
+        index_cols=["posting_date"]  # Add index for performance
     )
 
     # Query 1: Amount range
     print("\n--- Amount range query: 5,000 – 100,000 ---")
-    result = store.query("ledger", amount_range=(Decimal("5000"), Decimal("100000")))
+    result = store.query(
+        "ledger",
+        amount_range=(_DEC_5K, _DEC_100K),
+        project=["customer_name", "amount_num"]
+    )
     print(f"Found {len(result)} records")
     if not result.empty:
-        # FIX: Reset index to access amount_num as column
-        print(result.reset_index()[["customer_name", "amount_num"]].head(10))
+        # Take the head before dropping the index so only 10 rows are rebuilt
+        print(result.head(10).reset_index(drop=True))
 
     # Query 2: Aggregation
     print("\n--- Aggregation: sum(amount) by currency code ---")
@@ -142,11 +154,15 @@ def phase4_datastorage_demo(ep, ledger_file):
 
     # Query 3: Date range
     print("\n--- Date range query: Jan 2024 transactions ---")
-    result = store.query("ledger", date_range=("2024-01-01", "2024-01-31"))
+    result = store.query(
+        "ledger",
+        date_range=("2024-01-01", "2024-01-31"),
+        project=["customer_name", "amount_num"]
+    )
     print(f"Found {len(result)} records")
     if not result.empty:
-        # FIX: Reset index to access columns
-        print(result.reset_index()[["customer_name", "posting_date", "amount_num"]].head())
+        # Reset the index on the head only to expose posting_date
+        print(result.head().reset_index()[["customer_name", "posting_date", "amount_num"]])
 
     # Query 4: SQL fallback
     print("\n--- SQL fallback: top 3 customers by total amount ---")
@@ -168,8 +184,8 @@ if __name__ == "__main__":
         "data/sample/Customer_Ledger_Entries_FULL.xlsx",
     ]
 
-    ep, info = phase1_excel_info(file_list)
-    phase2_type_detection(ep, info)
+    ep, info, previews = phase1_excel_info(file_list)
+    phase2_type_detection(previews)
     phase3_format_parser_tests()
     
     ledger_file = file_list[1]
@@ -6,20 +6,18 @@ Streamlit-based UI for exploring and analyzing financial data
 import streamlit as st
 import pandas as pd
 import time
+import hashlib
 import plotly.express as px
-from pathlib import Path
-import sys
-import threading
+from datetime import date
 from decimal import Decimal
-
-# Add src directory to path
-sys.path.append(str(Path(__file__).resolve().parent.parent))
+from typing import Any, Dict, Optional, List, Tuple
 
 # Import your core modules
 from src.core.excel_processor import ExcelProcessor
 from src.core.type_detector import TypeDetector
 from src.core.format_parser import FormatParser
 from src.core.data_storage import DataStorage
+from src.utils.helpers import format_currency_series
 
 # Dashboard setup
 st.set_page_config(
@@ -28,45 +26,49 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if "processor" not in st.session_state:
-    st.session_state.processor = ExcelProcessor()
-if "storage" not in st.session_state:
-    st.session_state.storage = DataStorage()
-if "main_thread_id" not in st.session_state:
-    st.session_state.main_thread_id = threading.get_ident()
+# ---------- Cached helpers ----------
+# Parsed workbooks and detection results are keyed on the file's content
+# hash, so reruns (and Streamlit thread rotation) become cache lookups.
 
-# Store uploaded files in session state
-if "uploaded_files" not in st.session_state:
-    st.session_state.uploaded_files = None
+@st.cache_data(show_spinner=False)
+def _load_workbook(
+    name: str, file_hash: str, _data: bytes
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, Any]]]:
+    """Parse an uploaded workbook into ({sheet: DataFrame}, {sheet: meta})."""
+    processor = ExcelProcessor()
+    processor.load_buffer(name, _data)
+    sheets = {sheet: processor.get_full_data(name, sheet) for sheet in processor.full_data[name]}
+    return sheets, processor.get_sheet_info()[name]
 
-# Check for thread changes
-current_thread_id = threading.get_ident()
-if current_thread_id != st.session_state.main_thread_id:
-    # Preserve uploaded files
-    existing_files = st.session_state.uploaded_files
-    
-    # Reset storage and processor
+@st.cache_data(show_spinner=False)
+def _detect_types(
+    file_hash: str, sheet: str, _df: pd.DataFrame
+) -> Dict[str, Tuple[str, float]]:
+    return TypeDetector.detect_all(_df)
+
+# Scalar parsers memoized on the raw input string (errors are not cached)
+@st.cache_data(show_spinner=False, max_entries=4096)
+def parse_amount_cached(value: str) -> Decimal:
+    return FormatParser.parse_amount(value)
+
+@st.cache_data(show_spinner=False, max_entries=4096)
+def parse_date_cached(value: str) -> date:
+    return FormatParser.parse_date(value)
+
+def _preview(
+    file_key: str,
+    sheet_name: str,
+    rows: int = 5,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    df = st.session_state.workbooks[file_key][sheet_name]
+    return df.head(rows) if columns is None else df[columns].head(rows)
+
+# One DataStorage per browser session, so sessions never see (or
+# overwrite) each other's datasets
+if "storage" not in st.session_state:
     st.session_state.storage = DataStorage()
-    st.session_state.processor = ExcelProcessor()
-    st.session_state.main_thread_id = current_thread_id
-    st.session_state.uploaded_files = existing_files
-    
-    # Re-process files if they exist
-    if st.session_state.uploaded_files:
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
-        file_paths = []
-        
-        for file in st.session_state.uploaded_files:
-            path = temp_dir / file.name
-            with open(path, "wb") as f:
-                f.write(file.getbuffer())
-            file_paths.append(str(path))
-        
-        with st.spinner("Re-processing files for new thread..."):
-            st.session_state.processor.load_files(file_paths)
-            st.session_state.info = st.session_state.processor.get_sheet_info()
+storage = st.session_state.storage
 
 # Dashboard header
 st.title("📊 Financial Data Parser Dashboard")
@@ -84,25 +86,20 @@ with st.sidebar:
     )
     
     if uploaded_files:
-        # Save to session state
-        st.session_state.uploaded_files = uploaded_files
-        
-        # Save uploaded files to temp directory
-        temp_dir = Path("temp")
-        temp_dir.mkdir(exist_ok=True)
-        file_paths = []
-        
-        for file in uploaded_files:
-            path = temp_dir / file.name
-            with open(path, "wb") as f:
-                f.write(file.getbuffer())
-            file_paths.append(str(path))
-        
-        # Process files
+        st.session_state.workbooks = {}
+        st.session_state.file_hashes = {}
+        st.session_state.info = {}
+
+        # Process files (cached on content hash)
         with st.spinner("Processing files..."):
-            st.session_state.processor.load_files(file_paths)
-            st.session_state.info = st.session_state.processor.get_sheet_info()
-        st.success(f"Processed {len(file_paths)} files!")
+            for file in uploaded_files:
+                data = file.getvalue()
+                file_hash = hashlib.sha256(data).hexdigest()
+                sheets, sheet_info = _load_workbook(file.name, file_hash, data)
+                st.session_state.workbooks[file.name] = sheets
+                st.session_state.file_hashes[file.name] = file_hash
+                st.session_state.info[file.name] = sheet_info
+        st.success(f"Processed {len(uploaded_files)} files!")
 
 # Main dashboard tabs
 tab1, tab2, tab3, tab4 = st.tabs([
@@ -138,9 +135,7 @@ with tab1:
             
             # Data preview
             st.subheader("Data Preview")
-            df_preview = st.session_state.processor.preview_data(
-                file_key, sheet_name, rows=10
-            )
+            df_preview = _preview(file_key, sheet_name, rows=10)
             st.dataframe(df_preview, height=300)
 
 # Tab 2: Type Detection
@@ -151,16 +146,16 @@ with tab2:
         st.info("Upload Excel files to detect column types")
     else:
         # Run type detection
-        if "detection_results" not in st.session_state:
-            with st.spinner("Detecting column types..."):
-                df_preview = st.session_state.processor.preview_data(
-                    file_key, sheet_name, rows=200
-                )
-                st.session_state.detection_results = TypeDetector.detect_all(df_preview)
+        with st.spinner("Detecting column types..."):
+            detection_results = _detect_types(
+                st.session_state.file_hashes[file_key],
+                sheet_name,
+                _preview(file_key, sheet_name, rows=200)
+            )
         
         # Visualization
         detection_df = pd.DataFrame.from_dict(
-            st.session_state.detection_results, 
+            detection_results, 
             orient="index",
             columns=["Type", "Confidence"]
         ).reset_index().rename(columns={"index": "Column"})
@@ -191,7 +186,7 @@ with tab3:
         
         if st.button("Parse Amount"):
             try:
-                parsed = FormatParser.parse_amount(amount_input)
+                parsed = parse_amount_cached(amount_input)
                 st.success(f"Parsed value: {parsed}")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -202,7 +197,7 @@ with tab3:
         
         if st.button("Parse Date"):
             try:
-                parsed = FormatParser.parse_date(date_input)
+                parsed = parse_date_cached(date_input)
                 st.success(f"Parsed date: {parsed}")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -211,11 +206,12 @@ with tab3:
     if not uploaded_files:
         st.info("Upload files to see vectorized parsing")
     else:
-        df = st.session_state.processor.preview_data(file_key, sheet_name, rows=20)
+        df = _preview(file_key, sheet_name, rows=20).copy()
         if "Amount" in df.columns:
             with st.spinner("Parsing amounts..."):
                 df["Parsed Amount"] = FormatParser.parse_amount_vectorized(df["Amount"])
-                st.dataframe(df[["Amount", "Parsed Amount"]])
+                df["Formatted"] = format_currency_series(df["Parsed Amount"])
+                st.dataframe(df[["Amount", "Parsed Amount", "Formatted"]])
         else:
             st.warning("No 'Amount' column found in selected sheet")
 
@@ -226,31 +222,35 @@ with tab4:
     if not uploaded_files:
         st.info("Upload files to enable querying")
     else:
-        # Always ensure the data is stored before querying
-        if "query_df" not in st.session_state:
+        # Prepare and store the data only when the uploaded files change;
+        # the fingerprint is per session, like the storage it guards
+        data_fingerprint = tuple(st.session_state.file_hashes.values())
+        if (
+            st.session_state.get("query_data_fp") != data_fingerprint
+            or "query_data" not in storage.dataframes
+        ):
             # Prepare data
             file_key = list(st.session_state.info.keys())[0]
             sheet_name = list(st.session_state.info[file_key].keys())[0]
-            df = st.session_state.processor.preview_data(file_key, sheet_name, rows=500, 
-                                                        columns=["Posting Date", "Amount"])
+            df = _preview(file_key, sheet_name, rows=500,
+                          columns=["Posting Date", "Amount"]).copy()
             
             # Clean and parse
             df.columns = [col.lower().replace(" ", "_") for col in df.columns]
             if "amount" in df.columns:
                 df["amount_num"] = FormatParser.parse_amount_vectorized(df["amount"])
             if "posting_date" in df.columns:
-                df["posting_date"] = pd.to_datetime(df["posting_date"], errors="coerce")
+                df["posting_date"] = FormatParser.parse_date_column(df["posting_date"])
                 df = df.dropna(subset=["posting_date"])
             
             st.session_state.query_df = df
-        
-        # Always store the data
-        st.session_state.storage.store(
-            "query_data", 
-            st.session_state.query_df,
-            {},
-            index_cols=["posting_date", "amount_num"] if "posting_date" in st.session_state.query_df.columns and "amount_num" in st.session_state.query_df.columns else None
-        )
+            storage.store(
+                "query_data", 
+                df,
+                {"amount_num": "number", "posting_date": "datetime"},
+                index_cols=["posting_date"] if "posting_date" in df.columns else None
+            )
+            st.session_state.query_data_fp = data_fingerprint
         
         # Query interface
         query_type = st.radio("Query Type", ["Amount Range", "Date Range", "Custom SQL"])
@@ -260,12 +260,10 @@ with tab4:
             max_val = st.number_input("Max Amount", value=10000)
             
             if st.button("Run Amount Query"):
-                min_dec = Decimal(str(min_val))
-                max_dec = Decimal(str(max_val))
-                
-                results = st.session_state.storage.query(
+                # Range filters compare as float64; no Decimal round-trip needed
+                results = storage.query(
                     "query_data", 
-                    amount_range=(min_dec, max_dec)
+                    amount_range=(min_val, max_val)
                 )
                 st.dataframe(results)
         
@@ -274,16 +272,17 @@ with tab4:
             end_date = st.date_input("End Date")
             
             if st.button("Run Date Query"):
-                results = st.session_state.storage.query(
+                results = storage.query(
                     "query_data", 
                     date_range=(str(start_date), str(end_date)))
                 st.dataframe(results)
         
         else:
             sql_query = st.text_area("SQL Query", "SELECT * FROM query_data LIMIT 10")
+            st.caption("Dates are stored as Unix seconds; use datetime(col, 'unixepoch') to show them")
             if st.button("Execute SQL"):
                 try:
-                    results = st.session_state.storage.sql(sql_query)
+                    results = storage.sql(sql_query)
                     st.dataframe(results)
                 except Exception as e:
                     st.error(f"SQL Error: {str(e)}")
@@ -298,12 +297,17 @@ if "performance" not in st.session_state:
 if st.button("Run Performance Tests"):
     with st.spinner("Running benchmarks..."):
         # Simple performance tests
+        processor = ExcelProcessor()
+        data = next(f.getvalue() for f in uploaded_files if f.name == file_key)
         start = time.time()
-        st.session_state.processor.load_files([file_key])
+        processor.load_buffer(file_key, data)
+        # Sheets parse lazily; time the first access too, as the old eager load did
+        for sheet in processor.full_data[file_key]:
+            processor.get_full_data(file_key, sheet)
         st.session_state.performance["load_files"] = time.time() - start
         
         start = time.time()
-        st.session_state.processor.get_sheet_info()
+        processor.get_sheet_info()
         st.session_state.performance["get_sheet_info"] = time.time() - start
         
         if "amount" in st.session_state.query_df.columns:
@@ -1,9 +1,12 @@
-from setuptools import setup
+from setuptools import setup, find_packages
 
 setup(
     name="financial-data-parser",
     version="0.1.0",
     description="High-performance financial data processing toolkit",
     author="Muhammad Rehan Majeed",
-    install_requires=["pandas", "numpy", "openpyxl"],
-)
\ No newline at end of file
+    packages=find_packages(include=["src", "src.*"]),
+    python_requires=">=3.9",
+    install_requires=["pandas>=2.2", "numpy>=1.26", "openpyxl>=3.1", "python-calamine>=0.2"],
+    extras_require={"arrow": ["pyarrow>=14"], "numba": ["numba>=0.59"]},
+)
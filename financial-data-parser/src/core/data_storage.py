@@ -6,25 +6,122 @@ FIXED AGGREGATION METHOD
 
 from __future__ import annotations
 
+import os
 import sqlite3
+import tempfile
 import threading  # Add this import
+import weakref
 from decimal import Decimal
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Union
 
+import numpy as np
 import pandas as pd
+from pandas.api.typing import DataFrameGroupBy
+
+try:
+    import numexpr
+except ImportError:  # optional; plain NumPy predicates are used without it
+    numexpr = None
+
+try:
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    import pyarrow as pa
+except ImportError:  # optional; falls back to pandas' multi-row INSERTs
+    adbc_sqlite = None
+
+# Errors meaning the numba engine cannot handle an input (unsupported
+# dtype, failed type inference); aggregate() then uses pandas' Cython kernels
+NUMBA_FALLBACK_ERRORS: Tuple[type, ...] = (ImportError, NotImplementedError, TypeError)
+try:
+    import numba  # noqa: F401
+    from numba.core.errors import TypingError
+    NUMBA_AVAILABLE = True
+    NUMBA_FALLBACK_ERRORS += (TypingError,)
+except ImportError:  # optional; aggregate() then uses pandas' Cython kernels
+    NUMBA_AVAILABLE = False
+
+# Reductions pandas can JIT per column with engine="numba"
+NUMBA_MEASURES = frozenset({"sum", "mean", "min", "max", "var", "std"})
+
+# Bound parameters per statement (SQLITE_MAX_VARIABLE_NUMBER) caps the
+# rows a multi-row INSERT may carry
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# "str" columns with fewer distinct values than this share of rows are
+# stored as category, so grouping hashes small integer codes
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Applied to every connection; WAL lets readers run while a store() writes
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA mmap_size={1 << 30}",
+    "PRAGMA cache_size=-262144",
+)
+
+class _ConnectionOwner:
+    """Lives in one thread's local storage; when that thread ends it is
+    dropped, and the finalizer attached to it closes the thread's connection"""
+    __slots__ = ("__weakref__",)
+
+def _release(closers: List[weakref.finalize], db_path: Optional[str]) -> None:
+    # Close every thread's connection first; open handles keep the WAL
+    # files around (and block the unlink on Windows)
+    for close in closers:
+        close()
+    if db_path is None:
+        return  # caller-supplied database: close, but never delete
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(db_path + suffix)
+        except OSError:
+            pass
 
 class DataStorage:
-    def __init__(self) -> None:
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        """
+        db_path: SQLite file backing sql(); defaults to a temporary file
+        that is deleted with this object.
+        """
         self.dataframes: Dict[str, pd.DataFrame] = {}
         self.indexes: Dict[str, Dict[str, Any]] = {}
-        # Thread-local storage for SQLite connections
+        # Per dataset: {column: (argsort order, sorted values)} for range queries
+        self.sorted_indexes: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]] = {}
+        # Raw predicate arrays per dataset (numbers as float64, datetimes as
+        # int64 ns) with packed null bitmaps, for scans without an index
+        self.columns: Dict[str, Dict[str, np.ndarray]] = {}
+        self.null_bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        # Original dtypes of "str" columns stored as category, per dataset;
+        # query()/aggregate() hand results back in these dtypes
+        self._category_dtypes: Dict[str, Dict[str, Any]] = {}
+        # Reusable groupby objects per (dataset, group_by keys)
+        self._groupby_cache: Dict[Tuple[str, Tuple[str, ...]], DataFrameGroupBy] = {}
+        # One database file shared by all threads, one connection per thread;
+        # _conn_closers close them when their thread ends or this object goes
+        self._conn_closers: List[weakref.finalize] = []
+        temp_path = None
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(suffix=".sqlite")
+            os.close(fd)
+            temp_path = db_path
+        weakref.finalize(self, _release, self._conn_closers, temp_path)
+        self.db_path = db_path
         self.local = threading.local()
     
     def _get_sqlite_conn(self):
         """Get thread-specific SQLite connection"""
         if not hasattr(self.local, "conn"):
-            self.local.conn = sqlite3.connect(":memory:")
+            # Only this thread uses the connection, but the finalizer may
+            # close it from another one
+            self.local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.local.owner = _ConnectionOwner()
+            # Streamlit reruns on fresh threads; forget closers that already ran
+            self._conn_closers[:] = [close for close in self._conn_closers if close.alive]
+            self._conn_closers.append(weakref.finalize(self.local.owner, self.local.conn.close))
             self.local.conn.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                self.local.conn.execute(pragma)
         return self.local.conn
 
     def store(
@@ -34,92 +131,270 @@ class DataStorage:
         column_types: Dict[str, str],
         index_cols: Optional[List[str]] = None,
     ) -> None:
-        self.dataframes[name] = df.copy()
         self.indexes[name] = column_types
-        
+
+        # One canonical frame per dataset; set_index already returns a new frame.
+        # A shallow copy is only isolated from the caller under copy-on-write,
+        # which this module does not switch on itself
         if index_cols:
             self.dataframes[name] = df.set_index(index_cols).sort_index()
+        else:
+            self.dataframes[name] = df.copy(deep=not pd.options.mode.copy_on_write)
+
+        stored = self.dataframes[name]
+        self._category_dtypes[name] = {}
+        for col, col_type in column_types.items():
+            if col_type == "str" and col in stored.columns and len(stored):
+                if stored[col].nunique() / len(stored) < CATEGORY_MAX_UNIQUE_RATIO:
+                    self._category_dtypes[name][col] = stored[col].dtype
+                    stored[col] = stored[col].astype("category")
+
+        self.columns[name], self.null_bitmaps[name] = self._build_columns(stored)
+
+        self._groupby_cache = {
+            key: gb for key, gb in self._groupby_cache.items() if key[0] != name
+        }
+        self.sorted_indexes[name] = self._build_sorted_indexes(
+            self.dataframes[name], column_types, index_cols or []
+        )
 
         # Get thread-specific connection
         conn = self._get_sqlite_conn()
         
-        df_sql = df.copy()
+        # Columns are only ever replaced, never written in place, so a
+        # shallow copy is enough to keep the caller's frame untouched
+        df_sql = df.copy(deep=False)
         for col in df_sql.columns:
-            if df_sql[col].dtype == 'object' and any(isinstance(x, Decimal) for x in df_sql[col].dropna()):
-                df_sql[col] = df_sql[col].apply(
-                    lambda x: float(x) if isinstance(x, Decimal) else x
+            series = df_sql[col]
+            col_type = column_types.get(col)
+            if col_type is None and series.dtype == object:
+                # Untyped object column: infer from the first non-null value
+                first = series.first_valid_index()
+                if first is not None and isinstance(series[first], Decimal):
+                    col_type = "number"
+            if col_type == "number":
+                # to_numeric handles Decimal objects; anything else becomes NaN
+                df_sql[col] = pd.to_numeric(series, errors="coerce").astype("float64")
+            elif col_type == "datetime" or pd.api.types.is_datetime64_any_dtype(series):
+                df_sql[col] = self._epoch_seconds(series)
+            elif pd.api.types.is_numeric_dtype(series):
+                df_sql[col] = pd.to_numeric(series, errors="coerce")
+
+        self._write_table(conn, name, df_sql)
+
+        # Index range-filterable columns so BETWEEN/ORDER BY in sql() can seek
+        sql_index_cols = [col for col, t in column_types.items() if t in ("number", "datetime")]
+        sql_index_cols += [col for col in index_cols or [] if col not in sql_index_cols]
+        for col in sql_index_cols:
+            if col in df_sql.columns:
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{name}_{col}" ON "{name}" ("{col}")'
                 )
-            elif pd.api.types.is_datetime64_any_dtype(df_sql[col]):
-                df_sql[col] = df_sql[col].dt.strftime('%Y-%m-%d')
-            elif pd.api.types.is_numeric_dtype(df_sql[col]):
-                df_sql[col] = pd.to_numeric(df_sql[col], errors="coerce")
 
-        df_sql.to_sql(name, conn, if_exists="replace", index=False)  # Use thread-specific connection
+    def _build_sorted_indexes(
+        self,
+        df: pd.DataFrame,
+        column_types: Dict[str, str],
+        index_cols: List[str],
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """argsort each typed number/datetime column and each index column"""
+        sorted_indexes = {}
+        keys = [col for col, t in column_types.items() if t in ("number", "datetime")]
+        keys += [col for col in index_cols if col not in keys]
+
+        for key in keys:
+            if key not in df.columns and key not in df.index.names:
+                continue
+            values = self._key_values(df, key)
+            if column_types.get(key) == "datetime":
+                values = pd.to_datetime(values, errors="coerce")
+            elif column_types.get(key) == "number" or pd.api.types.is_object_dtype(values):
+                values = pd.to_numeric(values, errors="coerce")
+            values = np.asarray(values)
+            if not (np.issubdtype(values.dtype, np.number) or np.issubdtype(values.dtype, np.datetime64)):
+                continue
+            # NaN/NaT sort to the end, so they never fall inside a range
+            order = np.argsort(values, kind="stable")
+            sorted_indexes[key] = (order, values[order])
+        return sorted_indexes
+
+    def _write_table(self, conn: sqlite3.Connection, name: str, df_sql: pd.DataFrame) -> None:
+        """Replace table `name` with df_sql, bulk-loading through ADBC when available"""
+        table = None
+        if adbc_sqlite is not None:
+            try:
+                table = pa.Table.from_pandas(df_sql, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass  # mixed-type columns Arrow cannot hold; use INSERTs
+        if table is not None:
+            with adbc_sqlite.connect(self.db_path) as adbc_conn:
+                with adbc_conn.cursor() as cur:
+                    cur.adbc_ingest(name, table, mode="replace")
+                adbc_conn.commit()
+            return
+        chunksize = max(1, SQLITE_MAX_VARIABLES // max(1, len(df_sql.columns)))
+        df_sql.to_sql(  # Use thread-specific connection
+            name, conn, if_exists="replace", index=False, method="multi", chunksize=chunksize
+        )
+
+    @staticmethod
+    def _epoch_seconds(series: pd.Series) -> pd.Series:
+        """Datetimes as nullable int64 Unix seconds (SQL: datetime(col, 'unixepoch'))"""
+        dt = pd.to_datetime(series, errors="coerce")
+        if dt.dt.tz is not None:
+            dt = dt.dt.tz_convert(None)  # UTC, naive
+        return ((dt - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).astype("Int64")
+
+    @staticmethod
+    def _build_columns(
+        df: pd.DataFrame,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Contiguous arrays of every numeric/datetime column and index level"""
+        columns: Dict[str, np.ndarray] = {}
+        null_bitmaps: Dict[str, np.ndarray] = {}
+        named_levels = [name for name in df.index.names if name is not None]
+        for key in named_levels + [col for col in df.columns if isinstance(col, str)]:
+            values = DataStorage._key_values(df, key)
+            if pd.api.types.is_bool_dtype(values):
+                continue
+            if pd.api.types.is_datetime64_dtype(values):
+                arr = np.asarray(values, dtype="datetime64[ns]").view("i8")
+            elif pd.api.types.is_numeric_dtype(values):
+                arr = np.asarray(values, dtype=np.float64)
+            else:
+                continue
+            columns[key] = arr
+            null_bitmaps[key] = np.packbits(np.asarray(pd.isna(values)))
+        return columns, null_bitmaps
 
     def query(
         self,
         dataset: str,
         filters: Dict[str, Any] = None,
         date_range: Optional[Tuple[str, str]] = None,
-        amount_range: Optional[Tuple[Decimal, Decimal]] = None,
+        amount_range: Optional[Tuple[Union[Decimal, float], Union[Decimal, float]]] = None,
+        project: Optional[List[str]] = None,
     ) -> pd.DataFrame:
+        """
+        Filter a stored dataset.
+        amount_range: (low, high) as Decimal, int or float; compared as float64.
+        project: columns to return (index levels are always kept).
+        """
         filters = filters or {}
-        df = self.dataframes[dataset].copy()
-        
-        # Apply exact filters
-        for col, val in filters.items():
-            if col in df.columns:
-                df = df[df[col] == val]
+        df = self.dataframes[dataset]
+
+        # Range filters resolve to row positions against the stored frame
+        rows: Optional[np.ndarray] = None
 
         # Date range filtering
         if date_range:
             start, end = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-            found = False
-            
-            # Check index levels
-            if df.index.nlevels >= 1:
-                for level in df.index.names:
-                    if level and ('date' in level.lower() or 'time' in level.lower()):
-                        mask = (df.index.get_level_values(level) >= start) & (
-                            df.index.get_level_values(level) <= end
-                        )
-                        df = df[mask]
-                        found = True
-                        break
-            
-            # Check columns if not found in index
-            if not found:
-                for col in df.columns:
-                    if col and ('date' in col.lower() or 'time' in col.lower()):
-                        mask = (df[col] >= start) & (df[col] <= end)
-                        df = df[mask]
-                        break
+            key = self._range_key(dataset, df, "datetime", ("date", "time"))
+            if key is not None:
+                rows = self._intersect(
+                    rows, self._range_rows(dataset, df, key, start.to_datetime64(), end.to_datetime64())
+                )
 
         # Amount range filtering
         if amount_range:
             low, high = float(amount_range[0]), float(amount_range[1])
-            found = False
-            
-            # Check index levels
-            if df.index.nlevels >= 1:
-                for level in df.index.names:
-                    if level and ('amount' in level.lower() or 'value' in level.lower()):
-                        mask = (df.index.get_level_values(level) >= low) & (
-                            df.index.get_level_values(level) <= high
-                        )
-                        df = df[mask]
-                        found = True
-                        break
-            
-            # Check columns if not found in index
-            if not found:
-                for col in df.columns:
-                    if col and ('amount' in col.lower() or 'value' in col.lower()):
-                        mask = (df[col] >= low) & (df[col] <= high)
-                        df = df[mask]
-                        break
-
-        return df
+            key = self._range_key(dataset, df, "number", ("amount", "value"))
+            if key is not None:
+                rows = self._intersect(rows, self._range_rows(dataset, df, key, low, high))
+
+        # Apply exact filters as one combined boolean mask
+        mask: Optional[np.ndarray] = None
+        for col, val in filters.items():
+            if col in df.columns:
+                col_mask = df[col].to_numpy() == val
+                mask = col_mask if mask is None else mask & col_mask
+
+        if rows is None:
+            rows = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+        else:
+            rows = np.sort(rows)
+            if mask is not None:
+                rows = rows[mask[rows]]
+
+        # Column projection, applied in the same take as the row selection
+        if project is None:
+            cols = slice(None)
+        else:
+            cols = [df.columns.get_loc(col) for col in project if col in df.columns]
+
+        result = df.iloc[rows, cols]
+        restore = {
+            col: dtype for col, dtype in self._category_dtypes[dataset].items()
+            if col in result.columns
+        }
+        return result.astype(restore) if restore else result
+
+    def _range_key(
+        self,
+        dataset: str,
+        df: pd.DataFrame,
+        col_type: str,
+        keywords: Tuple[str, ...],
+    ) -> Optional[str]:
+        """Pick the index level or column a range filter applies to"""
+        # Index levels first
+        for level in df.index.names:
+            if level and any(k in level.lower() for k in keywords):
+                return level
+
+        # Then columns, preferring the declared type
+        candidates = [
+            col for col in df.columns
+            if isinstance(col, str) and any(k in col.lower() for k in keywords)
+        ]
+        declared = self.indexes.get(dataset, {})
+        for col in candidates:
+            if declared.get(col) == col_type:
+                return col
+        return candidates[0] if candidates else None
+
+    def _range_rows(
+        self,
+        dataset: str,
+        df: pd.DataFrame,
+        key: str,
+        low: Any,
+        high: Any,
+    ) -> np.ndarray:
+        """Positions of rows with low <= key <= high"""
+        sorted_index = self.sorted_indexes.get(dataset, {})
+        if key in sorted_index:
+            # Binary search on the pre-sorted values
+            order, values = sorted_index[key]
+            lo_i = np.searchsorted(values, low, side="left")
+            hi_i = np.searchsorted(values, high, side="right")
+            return order[lo_i:hi_i]
+
+        arr = self.columns.get(dataset, {}).get(key)
+        if arr is None:
+            values = np.asarray(self._key_values(df, key))
+            return np.flatnonzero((values >= low) & (values <= high))
+
+        # Scan the raw column; datetime bounds compare as int64 ns
+        if arr.dtype == np.int64:
+            low = np.datetime64(low, "ns").astype(np.int64)
+            high = np.datetime64(high, "ns").astype(np.int64)
+        if numexpr is not None:
+            mask = numexpr.evaluate("(arr >= low) & (arr <= high)")
+        else:
+            mask = (arr >= low) & (arr <= high)
+        nulls = np.unpackbits(self.null_bitmaps[dataset][key], count=len(arr)).view(bool)
+        return np.flatnonzero(mask & ~nulls)
+
+    @staticmethod
+    def _intersect(rows: Optional[np.ndarray], other: np.ndarray) -> np.ndarray:
+        return other if rows is None else np.intersect1d(rows, other, assume_unique=True)
+
+    @staticmethod
+    def _key_values(df: pd.DataFrame, key: str) -> pd.Index | pd.Series:
+        if key in df.index.names:
+            return df.index.get_level_values(key)
+        return df[key]
 
     def aggregate(
         self,
@@ -127,12 +402,49 @@ class DataStorage:
         group_by: List[str],
         measures: Dict[str, str],
     ) -> pd.DataFrame:
-        df = self.dataframes[dataset]
-        
-        # Reset index to access all columns
-        df = df.reset_index()
-        
-        return df.groupby(group_by)[list(measures.keys())].agg(measures)
+        key = (dataset, tuple(group_by))
+        gb = self._groupby_cache.get(key)
+        if gb is None:
+            # groupby resolves index level names too, so no reset_index copy
+            gb = self.dataframes[dataset].groupby(group_by, observed=True)
+            self._groupby_cache[key] = gb
+
+        result = None
+        if NUMBA_AVAILABLE and self._numba_eligible(self.dataframes[dataset], measures):
+            try:
+                result = pd.concat(
+                    {
+                        col: getattr(gb[col], how)(engine="numba", engine_kwargs={"parallel": True})
+                        for col, how in measures.items()
+                    },
+                    axis=1,
+                )
+            except NUMBA_FALLBACK_ERRORS:
+                pass  # e.g. extension dtypes numba cannot compile; use Cython
+        if result is None:
+            result = gb[list(measures.keys())].agg(measures)
+
+        # Group keys come back as categoricals for category-stored columns
+        index = result.index
+        for name, dtype in self._category_dtypes[dataset].items():
+            if name in group_by:
+                if isinstance(index, pd.MultiIndex):
+                    level = index.names.index(name)
+                    index = index.set_levels(index.levels[level].astype(dtype), level=level)
+                else:
+                    index = index.astype(dtype)
+        result.index = index
+        return result
+
+    @staticmethod
+    def _numba_eligible(df: pd.DataFrame, measures: Dict[str, str]) -> bool:
+        return all(
+            how in NUMBA_MEASURES
+            and col in df.columns
+            and pd.api.types.is_numeric_dtype(df[col])
+            and not pd.api.types.is_bool_dtype(df[col])
+            for col, how in measures.items()
+        )
 
     def sql(self, sql: str) -> pd.DataFrame:
         conn = self._get_sqlite_conn()  # Use thread-specific connection
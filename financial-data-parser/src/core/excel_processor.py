@@ -1,31 +1,367 @@
 from __future__ import annotations
+import hashlib
+import io
+import json
 import os
-from typing import Dict, List, Any, Optional
+import posixpath
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+import openpyxl
 import pandas as pd
-from typing import List, Dict, Tuple
+from pandas.io.parsers import TextParser
+from xml.etree import ElementTree
+
+# Frames handed out by get_full_data/preview_data share memory with the
+# cache; copy-on-write makes a caller's first mutation copy instead
+pd.set_option("mode.copy_on_write", True)
+
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE: Optional[str] = "calamine"
+except ImportError:  # fall back to pandas' default (openpyxl/xlrd)
+    EXCEL_ENGINE = None
+
+try:
+    import pyarrow.feather  # noqa: F401
+    FEATHER_AVAILABLE = True
+except ImportError:  # the on-disk sheet cache needs pyarrow
+    FEATHER_AVAILABLE = False
+
+class _SheetCache:
+    """Feather copies of parsed sheets, keyed by (path, mtime, size)"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _file(self, path: str, suffix: str, *parts: Any) -> str:
+        st = os.stat(path)
+        raw = "|".join(map(str, (os.path.abspath(path), st.st_mtime_ns, st.st_size) + parts))
+        return os.path.join(self.directory, hashlib.sha1(raw.encode()).hexdigest() + suffix)
+
+    def sheet_names(self, path: str) -> Optional[List[str]]:
+        try:
+            with open(self._file(path, ".json"), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def store_sheet_names(self, path: str, names: List[str]) -> None:
+        self._write(self._file(path, ".json"), lambda tmp: _dump_json(names, tmp))
+
+    def load(self, path: str, sheet: str, max_rows_hint: Optional[int]) -> Optional[pd.DataFrame]:
+        try:
+            df = pd.read_feather(self._file(path, ".feather", sheet, max_rows_hint))
+        except (OSError, ValueError):
+            return None
+        # Arrow brings missing text cells back as None; Excel parsing gives NaN
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].fillna(np.nan)
+        return df
+
+    def store(self, path: str, sheet: str, max_rows_hint: Optional[int], df: pd.DataFrame) -> None:
+        self._write(self._file(path, ".feather", sheet, max_rows_hint), df.to_feather)
+
+    @staticmethod
+    def _write(target: str, writer: Callable[[str], Any]) -> None:
+        # Write-then-rename so readers never see a partial file; frames
+        # Arrow cannot represent (mixed-type columns, non-str headers) are
+        # simply not cached
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            writer(tmp)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def _dump_json(obj: Any, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh)
+
+_XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_XLSX_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_LAST_ROW_RE = re.compile(r"(\d+)$")
+
+def _xlsx_last_rows(source: Union[str, bytes]) -> Dict[str, int]:
+    """
+    Last used row of every sheet, from the <dimension> record at the top of
+    each worksheet part. Nothing is parsed beyond that element, so this is
+    cheap even for huge sheets. Returns {} for anything that is not xlsx.
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as zf:
+            book = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+            rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+            targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_PKG_REL_NS}Relationship")}
+            last_rows: Dict[str, int] = {}
+            for sheet in book.iter(f"{_XLSX_NS}sheet"):
+                target = targets.get(sheet.get(_XLSX_REL), "")
+                part = target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+                with zf.open(part) as fh:
+                    for _, elem in ElementTree.iterparse(fh):
+                        if elem.tag == f"{_XLSX_NS}dimension":
+                            m = _LAST_ROW_RE.search(elem.get("ref", ""))
+                            if m:
+                                last_rows[sheet.get("name")] = int(m.group(1))
+                            break
+                        if elem.tag == f"{_XLSX_NS}sheetData":
+                            break  # no dimension record before the cells
+            return last_rows
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return {}
+
+class _WorkbookStub(NamedTuple):
+    """Where a workbook lives; readers are only opened while parsing"""
+    sheet_names: List[str]
+    source: Union[str, bytes]
+    max_rows_hint: Optional[int]
+    mtime: Optional[float]
+    # True data-row counts of sheets whose parse was cut at max_rows_hint
+    sheet_rows: Dict[str, int]
+    # Header/dimension metadata of unparsed sheets, read once for get_sheet_info
+    sheet_meta: Dict[str, Dict[str, Any]]
 
 class ExcelProcessor:
-    def __init__(self) -> None:
-        self._workbooks: Dict[str, pd.ExcelFile] = {}
-        self.full_data: Dict[str, Dict[str, pd.DataFrame]] = {}
+    def __init__(self, cache_dir: Optional[str] = None) -> None:
+        """
+        cache_dir: if set (and pyarrow is installed), parsed sheets are kept
+        there as Feather files and reused while the workbook is unchanged.
+        """
+        self._cache = _SheetCache(cache_dir) if cache_dir and FEATHER_AVAILABLE else None
+        self._workbooks: Dict[str, _WorkbookStub] = {}
+        # Sheets are parsed on first access; unparsed sheets hold None
+        self.full_data: Dict[str, Dict[str, Optional[pd.DataFrame]]] = {}
+        # Column-oriented views of every parsed sheet: {(file, sheet): {col: Series}}
+        # Series (not raw ndarrays) so copy-on-write tracks references to them
+        self._column_store: Dict[Tuple[str, str], Dict[Any, pd.Series]] = {}
+        # Bumped on every (re)load so derived caches can tell they are stale
+        self.load_generation = 0
 
-    def load_files(self, file_paths: List[str]) -> None:
+    def load_files(
+        self,
+        file_paths: List[str],
+        max_rows_hint: Optional[int] = None
+    ) -> None:
+        """
+        Register every file; sheets are parsed lazily on first access.
+        max_rows_hint: read at most this many data rows per sheet (None = all).
+        """
         for path in file_paths:
             if not os.path.isfile(path):
                 raise FileNotFoundError(path)
-            xls = pd.ExcelFile(path)
-            self._workbooks[path] = xls
-            self.full_data[path] = {}
-            for sheet in xls.sheet_names:
-                self.full_data[path][sheet] = xls.parse(sheet_name=sheet)
+        if not file_paths:
+            return
+        # Each file gets its own reader, so workbooks open independently
+        workers = min(32, (os.cpu_count() or 1) * 2, len(file_paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            names = list(pool.map(self._sheet_names_for, file_paths))
+        for path, sheet_names in zip(file_paths, names):
+            self._register(path, path, sheet_names, max_rows_hint)
+
+    def load_buffer(
+        self,
+        name: str,
+        data: bytes,
+        max_rows_hint: Optional[int] = None
+    ) -> None:
+        """
+        Register an in-memory workbook (e.g. an upload) without touching disk.
+        name: key the workbook is stored under in place of a file path.
+        """
+        self._register(name, data, self._read_sheet_names(data), max_rows_hint)
+
+    def _register(
+        self,
+        key: str,
+        source: Union[str, bytes],
+        sheet_names: List[str],
+        max_rows_hint: Optional[int]
+    ) -> None:
+        self.load_generation += 1
+        mtime = os.path.getmtime(source) if isinstance(source, str) else None
+        self._workbooks[key] = _WorkbookStub(
+            sheet_names, source, max_rows_hint, mtime, {}, {}
+        )
+        self.full_data[key] = {sheet: None for sheet in sheet_names}
+        for sheet in sheet_names:
+            self._column_store.pop((key, sheet), None)
+
+    def refresh(self) -> List[str]:
+        """
+        Reload workbooks whose file changed on disk since they were loaded.
+        Files that have since been removed keep their memoized sheets.
+        Returns the paths that were reloaded.
+        """
+        changed = []
+        for key, wb in list(self._workbooks.items()):
+            if wb.mtime is None:  # in-memory buffer
+                continue
+            try:
+                mtime = os.path.getmtime(wb.source)
+            except OSError:
+                continue
+            if mtime != wb.mtime:
+                self._register(key, wb.source, self._sheet_names_for(wb.source), wb.max_rows_hint)
+                changed.append(key)
+        return changed
+
+    def _get_sheet(self, file_path: str, sheet_name: str) -> pd.DataFrame:
+        """Parse a sheet on first access and memoize it"""
+        if file_path not in self.full_data:
+            raise ValueError(f"File not loaded: {file_path}")
+        if sheet_name not in self.full_data[file_path]:
+            raise ValueError(f"Sheet not found: {sheet_name}")
+        wb = self._workbooks[file_path]
+
+        df = self.full_data[file_path][sheet_name]
+        if df is None:
+            df, rows = self._read_cached_sheet(wb.source, sheet_name, wb.max_rows_hint)
+            if rows != len(df):
+                wb.sheet_rows[sheet_name] = rows
+            self.full_data[file_path][sheet_name] = df
+            self._column_store[(file_path, sheet_name)] = {
+                col: df[col] for col in df.columns
+            }
+        return df
+
+    def _sheet_names_for(self, path: str) -> List[str]:
+        names = self._cache.sheet_names(path) if self._cache else None
+        if names is None:
+            names = self._read_sheet_names(path)
+            if self._cache:
+                self._cache.store_sheet_names(path, names)
+        return names
+
+    def _read_cached_sheet(
+        self,
+        source: Union[str, bytes],
+        sheet_name: str,
+        max_rows_hint: Optional[int]
+    ) -> Tuple[pd.DataFrame, int]:
+        """The parsed sheet and its true number of data rows"""
+        if self._cache is None or not isinstance(source, str):
+            return self._read_sheet(source, sheet_name, max_rows_hint)
+        df = self._cache.load(source, sheet_name, max_rows_hint)
+        if df is None:
+            df, rows = self._read_sheet(source, sheet_name, max_rows_hint)
+            self._cache.store(source, sheet_name, max_rows_hint, df)
+            return df, rows
+        rows = len(df)
+        if max_rows_hint is not None and rows >= max_rows_hint:
+            rows = _xlsx_last_rows(source).get(sheet_name, rows + 1) - 1
+        return df, rows
+
+    @staticmethod
+    def _read_sheet_names(source: Union[str, bytes]) -> List[str]:
+        return ExcelProcessor._with_reader(source, lambda xls: list(xls.sheet_names))
+
+    @staticmethod
+    def _read_sheet(
+        source: Union[str, bytes],
+        sheet_name: str,
+        max_rows_hint: Optional[int]
+    ) -> Tuple[pd.DataFrame, int]:
+        def read(xls: pd.ExcelFile) -> Tuple[pd.DataFrame, int]:
+            df = xls.parse(sheet_name=sheet_name, nrows=max_rows_hint)
+            rows = len(df)
+            if max_rows_hint is not None and rows >= max_rows_hint:
+                # Cut at the hint: take the real size from the sheet's
+                # dimension record instead of parsing the rest
+                last_row = _xlsx_last_rows(source).get(sheet_name)
+                if last_row is None and isinstance(xls.book, openpyxl.Workbook):
+                    last_row = xls.book[sheet_name].max_row
+                if last_row is not None:
+                    rows = max(last_row - 1, rows)
+            return df, rows
+        return ExcelProcessor._with_reader(source, read)
+
+    @staticmethod
+    def _read_sheet_meta(
+        source: Union[str, bytes],
+        sheet_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Column names (header row only) and data-row counts (dimension record)
+        of every sheet, without parsing sheet bodies. rows is None when the
+        workbook records no dimension.
+        """
+        def read(xls: pd.ExcelFile) -> Dict[str, Dict[str, Any]]:
+            last_rows = _xlsx_last_rows(source)
+            meta = {}
+            for sheet in sheet_names:
+                columns = list(xls.parse(sheet_name=sheet, nrows=0).columns)
+                last_row = last_rows.get(sheet)
+                if last_row is None and isinstance(xls.book, openpyxl.Workbook):
+                    last_row = xls.book[sheet].max_row
+                rows = None if last_row is None else max(last_row - 1, 0)
+                meta[sheet] = {"rows": rows, "columns": columns}
+            return meta
+        try:
+            # openpyxl's read-only mode streams just the header row, while
+            # calamine would load each whole sheet even for nrows=0
+            return ExcelProcessor._open_and_run(source, "openpyxl", read)
+        except Exception:
+            return ExcelProcessor._with_reader(source, read)
+
+    @staticmethod
+    def _with_reader(source: Union[str, bytes], action: Callable[[pd.ExcelFile], Any]) -> Any:
+        try:
+            return ExcelProcessor._open_and_run(source, EXCEL_ENGINE, action)
+        except Exception:
+            if EXCEL_ENGINE is None:
+                raise
+            # calamine can reject files openpyxl/xlrd still read
+            return ExcelProcessor._open_and_run(source, None, action)
+
+    @staticmethod
+    def _open_and_run(
+        source: Union[str, bytes],
+        engine: Optional[str],
+        action: Callable[[pd.ExcelFile], Any]
+    ) -> Any:
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        # The reader is closed again as soon as the action returns
+        with pd.ExcelFile(source, engine=engine) as xls:
+            return action(xls)
+
+    def first_sheet(self, file_path: str) -> str:
+        """Name of the first sheet of a loaded workbook"""
+        if file_path not in self._workbooks:
+            raise ValueError(f"File not loaded: {file_path}")
+        return self._workbooks[file_path].sheet_names[0]
 
     def get_sheet_info(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        rows/cols/columns of every sheet. Unparsed sheets are described from
+        their header row and dimension record, so they stay unparsed; dtypes
+        are only known (non-empty) for sheets that have been parsed.
+        """
         info: Dict[str, Dict[str, Dict[str, Any]]] = {}
-        for path, sheets in self.full_data.items():
+        for path, wb in self._workbooks.items():
+            parsed = self.full_data[path]
+            if not wb.sheet_meta and any(df is None for df in parsed.values()):
+                wb.sheet_meta.update(self._read_sheet_meta(wb.source, wb.sheet_names))
             info[path] = {}
-            for sheet_name, df in sheets.items():
+            for sheet_name in wb.sheet_names:
+                df = parsed[sheet_name]
+                meta = wb.sheet_meta.get(sheet_name)
+                if df is None and meta is not None and meta["rows"] is not None:
+                    info[path][sheet_name] = {
+                        "rows": meta["rows"],
+                        "cols": len(meta["columns"]),
+                        "columns": meta["columns"],
+                        "dtypes": {}
+                    }
+                    continue
+                df = self._get_sheet(path, sheet_name)
                 info[path][sheet_name] = {
-                    "rows": len(df),
+                    "rows": wb.sheet_rows.get(sheet_name, len(df)),
                     "cols": len(df.columns),
                     "columns": list(df.columns),
                     "dtypes": {col: str(df[col].dtype) for col in df.columns}
@@ -39,16 +375,53 @@ class ExcelProcessor:
         rows: int = 5,
         columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
-        if file_path not in self.full_data:
-            raise ValueError(f"File not loaded: {file_path}")
-        if sheet_name not in self.full_data[file_path]:
-            raise ValueError(f"Sheet not found: {sheet_name}")
-        df = self.full_data[file_path][sheet_name]
-        return df.head(rows) if columns is None else df[columns].head(rows)
+        self._get_sheet(file_path, sheet_name)
+        store = self._column_store[(file_path, sheet_name)]
+        if columns is None:
+            columns = list(store)
+        # Build the preview from slices of the cached arrays (no per-call copy)
+        return pd.DataFrame({col: store[col].iloc[:rows] for col in columns}, copy=False)
 
     def get_full_data(self, file_path: str, sheet_name: str) -> pd.DataFrame:
-        if file_path not in self.full_data:
-            raise ValueError(f"File not loaded: {file_path}")
-        if sheet_name not in self.full_data[file_path]:
-            raise ValueError(f"Sheet not found: {sheet_name}")
-        return self.full_data[file_path][sheet_name].copy()
\ No newline at end of file
+        """A view of the cached sheet; copy-on-write keeps the cache intact"""
+        # Shallow copy shares the data; only the frame object is new
+        return self._get_sheet(file_path, sheet_name).copy(deep=False)
+
+    def get_full_data_mutable(self, file_path: str, sheet_name: str) -> pd.DataFrame:
+        """A private deep copy of the sheet"""
+        return self._get_sheet(file_path, sheet_name).copy()
+
+    def iter_sheets(
+        self,
+        file_path: str,
+        sheet_name: str,
+        chunksize: int = 10_000
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a sheet from disk in DataFrame chunks of `chunksize` rows."""
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(file_path)
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            if sheet_name not in wb.sheetnames:
+                raise ValueError(f"Sheet not found: {sheet_name}")
+            rows = wb[sheet_name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = list(header)
+            chunk = []
+            for row in rows:
+                # read_excel hands empty cells to the parser as "" too
+                chunk.append(["" if value is None else value for value in row])
+                if len(chunk) >= chunksize:
+                    yield self._chunk_frame(header, chunk)
+                    chunk = []
+            if chunk:
+                yield self._chunk_frame(header, chunk)
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _chunk_frame(header: List[Any], rows: List[List[Any]]) -> pd.DataFrame:
+        # Same row parser read_excel uses, so NA handling and dtypes match the parse path
+        return TextParser([header] + rows, header=0).read()
\ No newline at end of file
@@ -6,13 +6,62 @@ WITH VECTORIZED AMOUNT PARSING FOR PERFORMANCE
 
 from __future__ import annotations
 
+import functools
 import re
+import warnings
 from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
-from typing import Any
+from typing import Any, Tuple
 
 import pandas as pd
 import numpy as np
+from pandas.tseries.api import guess_datetime_format
+
+# Currency symbols, thousands separators, whitespace, parentheses, a
+# trailing minus and a leading minus are all stripped in one pass; the
+# sign is computed before cleaning
+_AMOUNT_CLEAN_RE = re.compile(r"[€$₹£¥,()\s]|(?<=\d)-$|(?<![\d.])-")
+_DECIMAL_COMMA_RE = re.compile(r",\d{1,2}\)?-?$")
+_PLAIN_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_SUFFIX_END_RE = re.compile(r"[KMB]$", re.I)
+_SUFFIX_RE = re.compile(r"([\d.]+)([KMB])", re.I)
+
+_SERIAL_DATE_RE = re.compile(r"\d+(?:\.\d+)?")
+_QUARTER_RE = re.compile(r"Q(\d)[- ]*(\d{2,4})", flags=re.I)
+_QUARTER_LONG_RE = re.compile(r"Quarter\s+(\d)\s+(\d{4})", flags=re.I)
+# strptime matches a space in a format against any whitespace run
+_WHITESPACE_RE = re.compile(r"\s")
+
+# Literal date formats, in the order parse_date tries them
+_DATE_FORMATS = (
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%Y-%m-%d",
+    "%d-%b-%Y",
+    "%d-%B-%Y",
+    "%b %Y",
+    "%B %Y",
+    "%d-%b-%y",
+    "%d-%B-%y",
+)
+
+try:
+    import ciso8601
+except ImportError:  # optional C parser for ISO dates
+    ciso8601 = None
+
+
+@functools.lru_cache(maxsize=None)
+def _candidate_formats(
+    starts_with_digit: bool, has_slash: bool, has_dash: bool, has_space: bool
+) -> Tuple[str, ...]:
+    """Formats whose separators and leading directive fit the string's shape"""
+    present = {"/": has_slash, "-": has_dash, " ": has_space}
+    return tuple(
+        fmt for fmt in _DATE_FORMATS
+        if (fmt[1] in "dmY") == starts_with_digit
+        and all(present[sep] for sep in "/- " if sep in fmt)
+    )
 
 
 class FormatParser:
@@ -75,37 +124,42 @@ class FormatParser:
             raise ValueError(f"Invalid amount: {value}") from exc
 
     @staticmethod
-    def parse_amount_vectorized(series: pd.Series) -> pd.Series:
+    def parse_amount_vectorized(series: pd.Series) -> np.ndarray:
         """
         Vectorized version of amount parsing (10-50x faster than apply)
-        Returns a Series of Decimal values
+        Returns a float64 array; unparseable values are NaN
+        """
+        if series.empty:
+            return np.array([], dtype=np.float64)
+
+        cleaned, signs = FormatParser._clean_amounts(series)
+
+        # Plain digit strings convert in one C pass; the few others
+        # (suffixes, regional leftovers, junk) go through the Decimal path
+        plain = cleaned.str.fullmatch(_PLAIN_NUMBER_RE).to_numpy()
+        result = np.full(len(cleaned), np.nan)
+        result[plain] = cleaned[plain].astype(np.float64).to_numpy() * signs[plain]
+        if not plain.all():
+            rest = FormatParser.parse_amount_decimal(series[~plain])
+            result[~plain] = [np.nan if val is None else float(val) for val in rest]
+        return result
+
+    @staticmethod
+    def parse_amount_decimal(series: pd.Series) -> pd.Series:
+        """
+        Exact variant of parse_amount_vectorized
+        Returns a Series of Decimal values (None where unparseable)
         """
         # Handle empty series
         if series.empty:
             return pd.Series([], dtype=object)
-        
-        # Convert to string and clean
-        cleaned = series.astype(str).str.strip()
-        
-        # Pre-compute signs
-        signs = np.where(
-            cleaned.str.startswith('(') & cleaned.str.endswith(')') |
-            cleaned.str.endswith('-') |
-            cleaned.str.startswith('-'),
-            -1, 1
-        )
-        
-        # Remove formatting characters
-        cleaned = cleaned.str.replace(r"[€$₹£¥,]", "", regex=True)
-        cleaned = cleaned.str.replace(r"\s+", "", regex=True)
-        cleaned = cleaned.str.replace(r"\(([^)]+)\)", r"\1", regex=True)
-        cleaned = cleaned.str.replace(r"(\d)-$", r"\1", regex=True)
-        cleaned = cleaned.str.replace(r"^-", "", regex=True)
+
+        cleaned, signs = FormatParser._clean_amounts(series)
         
         # Handle suffixes (K, M, B)
         suffix_map = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
-        suffix_mask = cleaned.str.contains(r"[KMB]$", case=False)
-        suffix_values = cleaned[suffix_mask].str.extract(r"([\d.]+)([KMB])", expand=False, flags=re.I)
+        suffix_mask = cleaned.str.contains(_SUFFIX_END_RE)
+        suffix_values = cleaned[suffix_mask].str.extract(_SUFFIX_RE, expand=False)
         
         # Process suffix values
         def process_suffix(row):
@@ -116,17 +170,11 @@ class FormatParser:
             except (TypeError, InvalidOperation):
                 return None
         
-        # Process non-suffix values
+        # Process non-suffix values; _clean_amounts already applied the
+        # decimal-comma rule and removed every comma
         def process_standard(val):
             try:
-                # Handle regional decimal formats
-                if val.count('.') > 1 and ',' in val:
-                    parts = val.split('.')
-                    val = parts[0] + ''.join(parts[1:-1]) + '.' + parts[-1]
-                elif ',' in val and '.' not in val:
-                    if re.search(r",\d{1,2}$", val):
-                        val = val.replace(',', '.', 1)
-                return Decimal(val.replace(',', ''))
+                return Decimal(val)
             except (TypeError, InvalidOperation):
                 return None
         
@@ -138,16 +186,95 @@ class FormatParser:
             suffix_results = suffix_values.apply(process_suffix, axis=1)
             result[suffix_mask] = suffix_results.values
         
-        # Process standard values
+        # Fast path: plain digit strings (the common case) go straight to
+        # Decimal; only the rest takes the per-cell regional fallback
         std_mask = ~suffix_mask
-        std_values = cleaned[std_mask].apply(process_standard)
-        result[std_mask] = std_values.values
+        plain_mask = std_mask & cleaned.str.fullmatch(_PLAIN_NUMBER_RE)
+        other_mask = std_mask & ~plain_mask
+        result[plain_mask.to_numpy()] = [Decimal(val) for val in cleaned[plain_mask]]
+        result[other_mask.to_numpy()] = cleaned[other_mask].apply(process_standard).values
+        
+        # Apply signs in the same pass that maps failures/NaN to None
+        return pd.Series(
+            [
+                None if val is None or val.is_nan() else (val * -1 if sign < 0 else val)
+                for val, sign in zip(result, signs)
+            ],
+            index=series.index,
+            dtype=object,
+        )
+
+    @staticmethod
+    def _clean_amounts(series: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        """Strip formatting from raw amounts; returns (cleaned strings, ±1 signs)"""
+        # Convert to string and clean
+        cleaned = series.astype(str).str.strip()
         
-        # Apply signs
-        signed_result = pd.Series(result, index=series.index) * signs
+        # Pre-compute signs
+        signs = np.where(
+            cleaned.str.startswith('(') & cleaned.str.endswith(')') |
+            cleaned.str.endswith('-') |
+            cleaned.str.startswith('-'),
+            -1, 1
+        )
         
-        # Convert to Decimal while preserving nulls
-        return signed_result.apply(lambda x: Decimal(x) if pd.notna(x) else None)
+        # Normalize decimal-comma formats (1.234,56 / 1234,56) before
+        # thousands separators are stripped, mirroring parse_amount
+        last_dot = cleaned.str.rfind('.')
+        last_comma = cleaned.str.rfind(',')
+        decimal_comma = (last_comma > last_dot) & (
+            (last_dot >= 0) | cleaned.str.contains(_DECIMAL_COMMA_RE)
+        )
+        cleaned = cleaned.where(
+            ~decimal_comma,
+            cleaned.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        )
+        
+        # Remove formatting characters
+        cleaned = cleaned.str.replace(_AMOUNT_CLEAN_RE, "", regex=True)
+        return cleaned, signs
+
+    @staticmethod
+    def parse_date_vectorized(series: pd.Series) -> pd.Series:
+        """
+        Batched version of parse_date.
+        Each distinct value is parsed once; unparseable values become None.
+        """
+        def safe_parse(val):
+            try:
+                return FormatParser.parse_date(val)
+            except ValueError:
+                return None
+
+        uniques = series.dropna().unique()
+        lookup = {val: safe_parse(val) for val in uniques}
+        return series.map(lookup).astype(object).where(series.notna(), None)
+
+    @staticmethod
+    def parse_date_column(series: pd.Series) -> pd.Series:
+        """
+        Vectorized datetime64 conversion of a whole column (NaT on failure).
+        The format is guessed once from a sample, so pandas parses with a
+        fixed format instead of inferring per value.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        if pd.api.types.is_numeric_dtype(series):
+            return pd.to_datetime(series, errors="coerce", cache=True)
+
+        sample = series.dropna().astype(str).head(10)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=UserWarning)
+            candidates = {guess_datetime_format(val) for val in sample} - {None}
+
+        # Ambiguous samples (01/02 vs 31/12) yield several guesses: keep the
+        # one that parses most of the sample
+        fmt, best = "mixed", 0
+        for candidate in sorted(candidates):
+            hits = pd.to_datetime(sample, errors="coerce", format=candidate).notna().sum()
+            if hits > best:
+                fmt, best = candidate, hits
+        return pd.to_datetime(series, errors="coerce", format=fmt, cache=True)
 
     # ---------- Date parsing ----------
     @staticmethod
@@ -158,13 +285,13 @@ class FormatParser:
         s = str(value).strip()
 
         # Excel serial date
-        if re.fullmatch(r"\d+(?:\.\d+)?", s):
+        if _SERIAL_DATE_RE.fullmatch(s):
             serial = float(s)
             epoch = datetime(1899, 12, 30)
             return (epoch + timedelta(days=serial)).date()
 
         # Quarter formats: Q1-24, Q1 2024, Quarter 1 2024
-        m = re.fullmatch(r"Q(\d)[- ]*(\d{2,4})", s, flags=re.I)
+        m = _QUARTER_RE.fullmatch(s)
         if m:
             q, yr = m.groups()
             yr = int(yr)
@@ -173,24 +300,26 @@ class FormatParser:
             month = {1: 1, 2: 4, 3: 7, 4: 10}[int(q)]
             return datetime(yr, month, 1).date()
 
-        m = re.fullmatch(r"Quarter\s+(\d)\s+(\d{4})", s, flags=re.I)
+        m = _QUARTER_LONG_RE.fullmatch(s)
         if m:
             q, yr = m.groups()
             month = {1: 1, 2: 4, 3: 7, 4: 10}[int(q)]
             return datetime(int(yr), month, 1).date()
 
-        # Common literal formats
-        for fmt in [
-            "%d/%m/%Y",
-            "%m/%d/%Y",
-            "%Y-%m-%d",
-            "%d-%b-%Y",
-            "%d-%B-%Y",
-            "%b %Y",
-            "%B %Y",
-            "%d-%b-%y",
-            "%d-%B-%y",
-        ]:
+        # Common literal formats, limited to those the string's shape allows
+        # so mismatches don't each raise and catch a ValueError
+        if s:
+            formats = _candidate_formats(
+                s[0].isdigit(), "/" in s, "-" in s, _WHITESPACE_RE.search(s) is not None
+            )
+        else:
+            formats = ()
+        for fmt in formats:
+            if fmt == "%Y-%m-%d" and ciso8601 is not None and len(s) == 10:
+                try:
+                    return ciso8601.parse_datetime(s).date()
+                except ValueError:
+                    pass
             try:
                 return datetime.strptime(s, fmt).date()
             except ValueError:
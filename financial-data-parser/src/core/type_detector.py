@@ -3,11 +3,60 @@ from __future__ import annotations
 import re
 import warnings
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Pattern, Tuple
 
 import pandas as pd
 import numpy as np
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional; format trials then run through pandas
+    pa = None
+
+# Compiled once; _try_number runs on every column of every sheet
+_NUMBER_CLEAN_RE = re.compile(r"[€$₹£¥,]|\s+")
+_PAREN_NEGATIVE_RE = re.compile(r"\(([^)]+)\)")
+_TRAILING_MINUS_RE = re.compile(r"(\d)-$")
+_SUFFIX_RE = re.compile(r"^([+-]?\d+\.?\d*)([KkMmBb])$")
+# Strings to_numeric rejects that Decimal() accepts ("nan", "1_000", "١٢٣",
+# "1e400") all contain a digit or "nan"
+_DECIMAL_RETRY_RE = re.compile(r"\d|nan", re.I)
+
+# Loose regex equivalents of strptime directives. A probe built from them
+# accepts everything its format can parse, so a format whose probe
+# matches < 95% of a sample cannot reach the 95% threshold either.
+_DIRECTIVE_PATTERNS = {
+    "%Y": r"\d{4}", "%y": r"\d{1,2}",
+    "%m": r"\s?\d{1,2}", "%d": r"\s?\d{1,2}",
+    "%H": r"\s?\d{1,2}", "%M": r"\s?\d{1,2}", "%S": r"\s?\d{1,2}",
+    "%b": r"[A-Za-z]+", "%B": r"[A-Za-z]+",
+}
+_DIRECTIVE_RE = re.compile(r"%.")
+
+
+def _format_probe(fmt: str) -> Optional[Pattern[str]]:
+    """Compile a regex that accepts a superset of what `fmt` parses (None if unsupported)."""
+    def literal(text: str) -> str:
+        return r"\s+".join(re.escape(part) for part in text.split(" "))
+
+    parts, pos = [], 0
+    for m in _DIRECTIVE_RE.finditer(fmt):
+        if m.group() not in _DIRECTIVE_PATTERNS:
+            return None
+        parts += [literal(fmt[pos:m.start()]), _DIRECTIVE_PATTERNS[m.group()]]
+        pos = m.end()
+    parts.append(literal(fmt[pos:]))
+    return re.compile("".join(parts))
+
+
+def _is_decimal(text: str) -> bool:
+    try:
+        Decimal(text)
+        return True
+    except InvalidOperation:
+        return False
+
 
 class TypeDetector:
     """
@@ -17,6 +66,7 @@ class TypeDetector:
     """
 
     MIN_CONFIDENCE = 0.6  # threshold for acceptance
+    SAMPLE_SIZE = 512  # rows used for datetime format trials
     
     # Common date formats for financial data
     COMMON_DATE_FORMATS = [
@@ -35,6 +85,10 @@ class TypeDetector:
         # Time formats
         '%H:%M:%S', '%H:%M'
     ]
+    # (format, probe) pairs; probe is None for formats pandas cannot parse (Q%q...)
+    _FORMAT_PROBES: List[Tuple[str, Optional[Pattern[str]]]] = [
+        (fmt, _format_probe(fmt)) for fmt in COMMON_DATE_FORMATS
+    ]
 
     # ---------- public ----------
 
@@ -72,8 +126,12 @@ class TypeDetector:
     @staticmethod
     def _try_datetime(s: pd.Series) -> Tuple[bool, float]:
         """Enhanced datetime detection with format inference and Excel support"""
-        # Handle Excel serial dates first (numeric values in date range)
-        if pd.api.types.is_numeric_dtype(s):
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return True, 1.0
+
+        # Numeric columns are only Excel serial dates or compact yyyymmdd
+        # integers; other numbers are never stringified
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
             if s.min() > 1000 and s.max() < 1000000:
                 try:
                     # Convert Excel serial numbers to dates
@@ -88,18 +146,54 @@ class TypeDetector:
                         return True, success_rate
                 except Exception:
                     pass
+            # 8-digit integers (20231231) may still be compact dates
+            is_compact = pd.api.types.is_integer_dtype(s) and s.between(10_000_000, 99_999_999).all()
+            if not is_compact:
+                return False, 0.0
 
-        # Try common explicit formats
-        max_success = 0.0
+        # Format trials run on a sample; only a winning format is verified
+        # against the whole column
         s_str = s.astype(str)
-        
-        for fmt in TypeDetector.COMMON_DATE_FORMATS:
+        sample = s_str
+        if len(s_str) > TypeDetector.SAMPLE_SIZE:
+            sample = s_str.sample(TypeDetector.SAMPLE_SIZE, random_state=0)
+
+        # Format trials use Arrow's C++ strptime when available; pandas
+        # still has the final say on the full column
+        sample_arr = None
+        if pa is not None:
+            sample_arr = pa.array(sample.to_numpy(), type=pa.string())
+
+        def trial_rate(fmt: str) -> float:
+            if sample_arr is not None:
+                parsed = pc.strptime(sample_arr, format=fmt, unit="s", error_is_null=True)
+                return 1 - parsed.null_count / len(parsed)
+            return pd.to_datetime(sample, format=fmt, errors='coerce').notnull().mean()
+
+        def verified(rate: float, by_pandas: bool, **kwargs) -> float:
+            if by_pandas and sample is s_str:
+                return rate
+            return pd.to_datetime(s_str, errors='coerce', **kwargs).notnull().mean()
+
+        # One cheap regex pass per distinct probe decides which formats are
+        # worth a real parse
+        probe_rates: Dict[Pattern[str], float] = {}
+        for _, probe in TypeDetector._FORMAT_PROBES:
+            if probe is not None and probe not in probe_rates:
+                probe_rates[probe] = sample.str.fullmatch(probe).mean()
+
+        max_success = 0.0
+        for fmt, probe in TypeDetector._FORMAT_PROBES:
+            if probe is None or probe_rates[probe] < 0.95:
+                continue
             try:
-                converted = pd.to_datetime(s_str, format=fmt, errors='coerce')
-                success_rate = converted.notnull().mean()
-                if success_rate >= 0.95:
-                    return True, success_rate
-                max_success = max(max_success, success_rate)
+                sample_rate = trial_rate(fmt)
+                if sample_rate >= 0.95:
+                    success_rate = verified(sample_rate, sample_arr is None, format=fmt)
+                    if success_rate >= 0.95:
+                        return True, success_rate
+                    sample_rate = success_rate
+                max_success = max(max_success, sample_rate)
             except Exception:
                 continue
 
@@ -107,11 +201,13 @@ class TypeDetector:
         with warnings.catch_warnings():
             warnings.simplefilter("ignore", category=UserWarning)
             try:
-                converted = pd.to_datetime(s_str, errors='coerce')
-                success_rate = converted.notnull().mean()
-                if success_rate >= 0.95:
-                    return True, success_rate
-                max_success = max(max_success, success_rate)
+                sample_rate = pd.to_datetime(sample, errors='coerce').notnull().mean()
+                if sample_rate >= 0.95:
+                    success_rate = verified(sample_rate, True)
+                    if success_rate >= 0.95:
+                        return True, success_rate
+                    sample_rate = success_rate
+                max_success = max(max_success, sample_rate)
             except Exception:
                 pass
 
@@ -119,33 +215,29 @@ class TypeDetector:
 
     @staticmethod
     def _try_number(s: pd.Series) -> Tuple[bool, float]:
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            return True, 1.0
+
         # Remove common currency symbols & thousand separators
-        cleaned = (
-            s.astype(str)
-            .str.replace(r"[€$₹£¥,]", "", regex=True)
-            .str.replace(r"\s+", "", regex=True)
-        )
+        cleaned = s.astype(str).str.replace(_NUMBER_CLEAN_RE, "", regex=True)
 
         # Allow negative numbers in parentheses  (1 234)  or  1 234-
-        cleaned = cleaned.str.replace(r"\(([^)]+)\)", r"-\1", regex=True)
-        cleaned = cleaned.str.replace(r"(\d)-$", r"-\1", regex=True)
-
-        # Accept K, M, B suffixes (1.2K → 1200)
-        suffix_map = {"K": 1e3, "M": 1e6, "B": 1e9}
-        pattern = re.compile(r"^([+-]?\d+\.?\d*)([KkMmBb])$")
-
-        def parse(x: str) -> bool:
-            # Abbreviated amounts
-            m = pattern.match(x)
-            if m:
-                return True
-            # Exact decimals
-            try:
-                Decimal(x)
-                return True
-            except InvalidOperation:
-                return False
+        cleaned = cleaned.str.replace(_PAREN_NEGATIVE_RE, r"-\1", regex=True)
+        cleaned = cleaned.str.replace(_TRAILING_MINUS_RE, r"-\1", regex=True)
+
+        # Accept K, M, B suffixes (1.2K → 1200) and anything to_numeric parses
+        success_mask = np.array(
+            cleaned.str.match(_SUFFIX_RE)
+            | pd.to_numeric(cleaned, errors="coerce").notna(),
+            dtype=bool,
+        )
 
-        success_mask = cleaned.apply(parse)
+        # to_numeric is stricter than Decimal(), which used to decide; give
+        # its plausible rejects (and only those) the Decimal check
+        retry = ~success_mask & cleaned.str.contains(_DECIMAL_RETRY_RE).to_numpy(dtype=bool)
+        if retry.any():
+            values = cleaned.to_numpy()[retry]
+            verdicts = {value: _is_decimal(value) for value in set(values)}
+            success_mask[retry] = [verdicts[value] for value in values]
         conf = success_mask.mean()
-        return conf >= TypeDetector.MIN_CONFIDENCE, conf
\ No newline at end of file
+        return conf >= TypeDetector.MIN_CONFIDENCE, conf
@@ -1,9 +1,18 @@
- """Generic helper functions"""
+"""Generic helper functions"""
+
+import pandas as pd
+
+# Single-pass replacement table for clean_column_name
+_CLEAN_TABLE = str.maketrans({" ": "_", "-": "_"})
 
 def format_currency(value: float) -> str:
     """Format number as currency string"""
     return f"${value:,.2f}"
 
+def format_currency_series(values: pd.Series) -> pd.Series:
+    """Format a numeric column as currency strings (NaN stays NaN)"""
+    return "$" + values.map("{:,.2f}".format, na_action="ignore")
+
 def clean_column_name(name: str) -> str:
     """Standardize column names for processing"""
-    return name.lower().replace(" ", "_").replace("-", "_")
\ No newline at end of file
+    return name.lower().translate(_CLEAN_TABLE)
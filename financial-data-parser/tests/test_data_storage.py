@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+import pytest
+import sqlite3
 from decimal import Decimal
 from src.core.data_storage import DataStorage
 
@@ -43,4 +46,325 @@ def test_store_and_query():
         result2.reset_index(drop=True), 
         expected2.reset_index(drop=True),
         check_dtype=False
-    )
\ No newline at end of file
+    )
+
+def test_query_projection():
+    df = pd.DataFrame({
+        "customer": ["A", "B", "C"],
+        "amount": ["100", "200", "300"],
+        "amount_num": [100.0, 200.0, 300.0],
+        "posting_date": pd.to_datetime(["2023-01-01", "2023-01-02", "2023-01-03"])
+    })
+    store = DataStorage()
+    store.store(
+        "test",
+        df,
+        column_types={"amount_num": "number", "posting_date": "datetime"},
+        index_cols=["posting_date"]
+    )
+
+    # The typed amount_num column is filtered, not the raw "amount" text
+    result = store.query("test", amount_range=(150, 300), project=["customer"])
+    assert list(result.columns) == ["customer"]
+    assert list(result["customer"]) == ["B", "C"]
+    assert result.index.name == "posting_date"
+
+
+def test_combined_range_query_uses_sorted_index():
+    df = pd.DataFrame({
+        "customer": ["A", "B", "C", "D"],
+        "amount_num": [Decimal("400"), Decimal("100"), Decimal("300"), Decimal("200")],
+        "posting_date": pd.to_datetime(["2023-01-04", "2023-01-01", "2023-01-03", "2023-01-02"])
+    })
+    store = DataStorage()
+    store.store(
+        "test",
+        df,
+        column_types={"amount_num": "number", "posting_date": "datetime"},
+        index_cols=["posting_date"]
+    )
+    assert set(store.sorted_indexes["test"]) == {"amount_num", "posting_date"}
+
+    result = store.query(
+        "test",
+        date_range=("2023-01-02", "2023-01-04"),
+        amount_range=(Decimal("150"), Decimal("350"))
+    )
+    # Rows keep the stored (posting_date) order
+    assert list(result["customer"]) == ["D", "C"]
+
+
+def test_filters_combine_with_ranges():
+    df = pd.DataFrame({
+        "customer": ["A", "B", "A", "B"],
+        "amount_num": [100.0, 200.0, 300.0, 400.0],
+    })
+    store = DataStorage()
+    store.store("test", df, column_types={"amount_num": "number"})
+
+    result = store.query("test", filters={"customer": "A"}, amount_range=(150, 500))
+    assert list(result["amount_num"]) == [300.0]
+
+    # Results are independent of the stored frame
+    everything = store.query("test")
+    everything["amount_num"] = 0.0
+    assert list(store.query("test")["amount_num"]) == [100.0, 200.0, 300.0, 400.0]
+
+
+def test_sql_mirror_indexes_range_columns():
+    df = pd.DataFrame({
+        "customer": ["A", "B"],
+        "amount_num": [100.0, 200.0],
+        "posting_date": pd.to_datetime(["2023-01-01", "2023-01-02"])
+    })
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number", "posting_date": "datetime"})
+
+    indexes = store.sql("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert set(indexes["name"]) == {"idx_test_amount_num", "idx_test_posting_date"}
+    result = store.sql("SELECT customer FROM test WHERE amount_num BETWEEN 150 AND 250")
+    assert list(result["customer"]) == ["B"]
+
+
+def test_aggregate_on_index_level_and_category():
+    df = pd.DataFrame({
+        "customer": ["A", "B", "A", "A", "B"],
+        "amount_num": [1.0, 2.0, 3.0, 4.0, 5.0],
+        "posting_date": pd.to_datetime(
+            ["2023-01-01", "2023-01-01", "2023-01-02", "2023-01-02", "2023-01-03"]
+        )
+    })
+    store = DataStorage()
+    store.store("test", df, {"customer": "str", "amount_num": "number"}, index_cols=["posting_date"])
+
+    assert store.dataframes["test"]["customer"].dtype == "category"
+    by_customer = store.aggregate("test", ["customer"], {"amount_num": "sum"})
+    assert by_customer["amount_num"].to_dict() == {"A": 8.0, "B": 7.0}
+    by_date = store.aggregate("test", ["posting_date"], {"amount_num": "sum"})
+    assert list(by_date["amount_num"]) == [3.0, 7.0, 5.0]
+
+
+def test_category_storage_keeps_result_dtypes():
+    df = pd.DataFrame({
+        "customer": ["A", "B", "A", "A", "B", "A"],
+        "region": ["N", "N", "S", "S", "N", "S"],
+        "amount_num": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+    store = DataStorage()
+    store.store("test", df, {"customer": "str", "region": "str", "amount_num": "number"})
+    assert store.dataframes["test"]["customer"].dtype == "category"
+
+    result = store.query("test", amount_range=(2, 5))
+    assert result.dtypes.to_dict() == df.dtypes.to_dict()
+    assert store.query("test", project=["customer"])["customer"].dtype == object
+
+    by_customer = store.aggregate("test", ["customer"], {"amount_num": "sum"})
+    assert by_customer.index.dtype == object
+    by_both = store.aggregate("test", ["customer", "region"], {"amount_num": "sum"})
+    assert all(level.dtype == object for level in by_both.index.levels)
+    assert by_both["amount_num"].to_dict() == {
+        ("A", "N"): 1.0, ("A", "S"): 13.0, ("B", "N"): 7.0
+    }
+
+
+def test_range_scan_on_untyped_columns():
+    df = pd.DataFrame({
+        "amount": [100.0, np.nan, 300.0],
+        "value_date": pd.to_datetime(["2023-01-01", None, "2023-03-01"])
+    })
+    store = DataStorage()
+    store.store("test", df, {})
+
+    assert "amount" in store.columns["test"]
+    assert len(store.query("test", amount_range=(50, 150))) == 1
+    assert len(store.query("test", date_range=("2022-12-01", "2023-12-01"))) == 2
+
+
+def test_sql_mirror_is_shared_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    df = pd.DataFrame({"customer": ["A", "B"], "amount_num": [1.0, 2.0]})
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number"})
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = pool.submit(store.sql, "SELECT SUM(amount_num) AS total FROM test").result()
+    assert result["total"].iloc[0] == 3.0
+
+
+def test_sql_mirror_stores_datetimes_as_epoch_seconds():
+    df = pd.DataFrame({"posting_date": pd.to_datetime(["2023-01-02 03:04:05", None])})
+    store = DataStorage()
+    store.store("test", df, {"posting_date": "datetime"})
+
+    result = store.sql(
+        "SELECT typeof(posting_date) AS t, datetime(posting_date, 'unixepoch') AS ts FROM test"
+    )
+    assert list(result["t"]) == ["integer", "null"]
+    assert result["ts"].iloc[0] == "2023-01-02 03:04:05"
+
+
+def test_amount_range_prefers_declared_numeric_column():
+    df = pd.DataFrame({
+        "amount": ["$100.00", "$200.00", "bad"],
+        "amount_num": [100.0, 200.0, np.nan],
+        "posting_date": pd.to_datetime(["2023-01-01", "2023-01-02", "2023-01-03"])
+    })
+    store = DataStorage()
+    store.store(
+        "test", df, {"amount_num": "number", "posting_date": "datetime"},
+        index_cols=["posting_date"]
+    )
+
+    result = store.query("test", amount_range=(150, 250))
+    assert list(result["amount_num"]) == [200.0]
+
+
+def test_number_column_with_mixed_decimal_and_text():
+    df = pd.DataFrame({"amount_num": [Decimal("1.5"), None, "x", "2", "1,000", ""]})
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number"})
+
+    result = store.sql("SELECT amount_num FROM test")["amount_num"]
+    assert result.isna().tolist() == [False, True, True, False, True, True]
+    assert result[[0, 3]].tolist() == [1.5, 2.0]
+
+
+def test_sql_round_trip_on_insert_fallback(monkeypatch):
+    import src.core.data_storage as data_storage
+
+    # Force pandas' multi-row INSERTs, split over several statements
+    monkeypatch.setattr(data_storage, "adbc_sqlite", None)
+    monkeypatch.setattr(data_storage, "SQLITE_MAX_VARIABLES", 6)
+    df = pd.DataFrame({
+        "customer": ["A", None, "C", "D", None],
+        "amount_num": [1.5, np.nan, -3.0, np.nan, 5.25],
+        "posting_date": pd.to_datetime(
+            ["2023-01-02 03:04:05", None, "2024-02-29 00:00:00", None, "1999-12-31 23:59:59"]
+        ),
+    })
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number", "posting_date": "datetime"})
+
+    result = store.sql(
+        "SELECT customer, amount_num, datetime(posting_date, 'unixepoch') AS posting_date FROM test"
+    )
+    assert len(result) == len(df)
+    assert result["customer"].isna().tolist() == df["customer"].isna().tolist()
+    pd.testing.assert_series_equal(result["amount_num"], df["amount_num"])
+    pd.testing.assert_series_equal(pd.to_datetime(result["posting_date"]), df["posting_date"])
+
+
+def test_aggregate_numba_engine_matches_cython(monkeypatch):
+    pytest.importorskip("numba")
+    import src.core.data_storage as data_storage
+
+    df = pd.DataFrame({
+        "customer": ["A", "B", "A", "C", "B", "A"],
+        "amount_num": [1.0, 2.5, -3.0, 4.0, np.nan, 6.5],
+        "qty": [1, 2, 3, 4, 5, 6],
+    })
+    measures = {"amount_num": "sum", "qty": "mean"}
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number", "qty": "number"})
+    assert data_storage.NUMBA_AVAILABLE
+    assert DataStorage._numba_eligible(store.dataframes["test"], measures)
+    jitted = store.aggregate("test", ["customer"], measures)
+
+    monkeypatch.setattr(data_storage, "NUMBA_AVAILABLE", False)
+    pd.testing.assert_frame_equal(jitted, store.aggregate("test", ["customer"], measures))
+
+
+def test_temporary_database_is_removed():
+    import gc
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = DataStorage()
+    store.store("test", pd.DataFrame({"amount_num": [1.0, 2.0]}), {"amount_num": "number"})
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(store.sql, "SELECT * FROM test").result()
+    db_path = store.db_path
+    assert os.path.exists(db_path)
+
+    del store
+    gc.collect()
+    assert not any(os.path.exists(db_path + suffix) for suffix in ("", "-wal", "-shm"))
+
+
+@pytest.mark.parametrize("copy_on_write", [False, True])
+def test_store_is_isolated_from_caller_mutations(copy_on_write):
+    # Other test modules import excel_processor, which turns copy-on-write
+    # on globally; DataStorage must not depend on that
+    with pd.option_context("mode.copy_on_write", copy_on_write):
+        df = pd.DataFrame({"customer": ["A", "B"], "amount_num": [100.0, 200.0]})
+        store = DataStorage()
+        store.store("test", df, {"amount_num": "number"})
+        df.loc[0, "amount_num"] = 999.0
+
+        result = store.query("test", amount_range=(50, 150))
+        assert result["amount_num"].tolist() == [100.0]
+        assert store.dataframes["test"]["amount_num"].tolist() == [100.0, 200.0]
+
+
+def test_thread_connections_close_when_thread_ends(tmp_path):
+    import gc
+    import threading
+
+    db_path = str(tmp_path / "mirror.sqlite")
+    store = DataStorage(db_path=db_path)
+    store.store("test", pd.DataFrame({"amount_num": [1.0]}), {"amount_num": "number"})
+
+    conns = []
+    for _ in range(3):  # e.g. one Streamlit rerun per thread
+        thread = threading.Thread(target=lambda: conns.append(store._get_sqlite_conn()))
+        thread.start()
+        thread.join()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    # A caller-supplied database is closed with the object but kept on disk
+    main_conn = store._get_sqlite_conn()
+    del store
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):
+        main_conn.execute("SELECT 1")
+    assert (tmp_path / "mirror.sqlite").exists()
+
+
+
+def test_aggregate_numba_fallback_only_for_unsupported_input(monkeypatch):
+    import src.core.data_storage as data_storage
+
+    df = pd.DataFrame({"customer": ["A", "B", "A"], "amount_num": [1.0, 2.0, 3.0]})
+    store = DataStorage()
+    store.store("test", df, {"amount_num": "number"})
+    expected = store.aggregate("test", ["customer"], {"amount_num": "sum"})
+    monkeypatch.setattr(data_storage, "NUMBA_AVAILABLE", True)
+
+    class FailingColumn:
+        def __init__(self, error):
+            self.error = error
+
+        def sum(self, **kwargs):
+            raise self.error
+
+    class FailingGroupBy:
+        def __init__(self, error):
+            self.error = error
+
+        def __getitem__(self, key):
+            if isinstance(key, list):  # the Cython fallback
+                return store.dataframes["test"].groupby("customer")[key]
+            return FailingColumn(self.error)
+
+    key = ("test", ("customer",))
+    store._groupby_cache[key] = FailingGroupBy(NotImplementedError("dtype"))
+    pd.testing.assert_frame_equal(
+        store.aggregate("test", ["customer"], {"amount_num": "sum"}), expected
+    )
+
+    store._groupby_cache[key] = FailingGroupBy(ZeroDivisionError("bug"))
+    with pytest.raises(ZeroDivisionError):
+        store.aggregate("test", ["customer"], {"amount_num": "sum"})
@@ -1,3 +1,6 @@
+import os
+import shutil
+import pandas as pd
 import pytest
 from pathlib import Path
 from src.core.excel_processor import ExcelProcessor
@@ -21,4 +24,105 @@ def test_get_sheet_info(ep, sample_files):
     ep.load_files(sample_files)
     info = ep.get_sheet_info()
     # keys are full paths, so use `in`
-    assert any("KH_Bank.XLSX" in k for k in info.keys())
\ No newline at end of file
+    assert any("KH_Bank.XLSX" in k for k in info.keys())
+
+def test_load_files_max_rows_hint(ep, sample_files):
+    ep.load_files(sample_files, max_rows_hint=10)
+    assert all(len(ep.get_full_data(f, ep.first_sheet(f))) == 10 for f in sample_files)
+    # The hint only limits what is parsed; the metadata keeps the real size
+    info = ep.get_sheet_info()
+    assert info[sample_files[0]][ep.first_sheet(sample_files[0])]["rows"] == 1221
+    assert info[sample_files[1]][ep.first_sheet(sample_files[1])]["rows"] == 5505
+
+def test_max_rows_hint_row_count_from_sheet_cache(tmp_path, sample_files):
+    pytest.importorskip("pyarrow")
+    path = sample_files[0]
+    for _ in range(2):  # parse, then a Feather cache hit
+        ep = ExcelProcessor(cache_dir=str(tmp_path))
+        ep.load_files([path], max_rows_hint=10)
+        ep.get_full_data(path, ep.first_sheet(path))
+        assert ep.get_sheet_info()[path][ep.first_sheet(path)]["rows"] == 1221
+
+def test_load_buffer(ep, sample_files):
+    data = Path(sample_files[0]).read_bytes()
+    ep.load_buffer("upload.xlsx", data)
+    ep.load_files(sample_files[:1])
+    assert ep.get_sheet_info()["upload.xlsx"] == ep.get_sheet_info()[sample_files[0]]
+
+def test_sheets_parse_lazily(ep, sample_files):
+    ep.load_files(sample_files[:1])
+    sheet = ep.first_sheet(sample_files[0])
+    assert ep.full_data[sample_files[0]][sheet] is None
+    preview = ep.preview_data(sample_files[0], sheet, rows=3)
+    assert ep.full_data[sample_files[0]][sheet] is not None
+    assert len(preview) <= 3
+
+def test_get_full_data_does_not_leak_mutations(ep, sample_files):
+    ep.load_files(sample_files[:1])
+    sheet = ep.first_sheet(sample_files[0])
+    df = ep.get_full_data(sample_files[0], sheet)
+    original = df.iloc[0, 0]
+    df.iloc[0, 0] = "changed"
+    assert ep.get_full_data(sample_files[0], sheet).iloc[0, 0] == original
+    assert ep.get_full_data_mutable(sample_files[0], sheet) is not df
+
+def test_sheet_cache_round_trip(tmp_path, sample_files):
+    pytest.importorskip("pyarrow")
+    path = sample_files[1]
+    first = ExcelProcessor(cache_dir=str(tmp_path))
+    first.load_files([path])
+    sheet = first.first_sheet(path)
+    expected = first.get_full_data(path, sheet)
+
+    assert list(tmp_path.glob("*.feather"))
+    second = ExcelProcessor(cache_dir=str(tmp_path))
+    second.load_files([path])
+    pd.testing.assert_frame_equal(second.get_full_data(path, sheet), expected)
+
+def test_iter_sheets_matches_parse(ep, sample_files):
+    path = sample_files[0]
+    ep.load_files([path])
+    sheet = ep.first_sheet(path)
+    chunks = list(ep.iter_sheets(path, sheet, chunksize=500))
+    assert [len(c) for c in chunks] == [500, 500, 221]
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, ep.get_full_data(path, sheet))
+
+def test_get_sheet_info_does_not_parse(ep, sample_files):
+    ep.load_files(sample_files)
+    info = ep.get_sheet_info()
+    assert all(df is None for sheets in ep.full_data.values() for df in sheets.values())
+
+    for path in sample_files:
+        sheet = ep.first_sheet(path)
+        df = ep.get_full_data(path, sheet)
+        assert info[path][sheet]["rows"] == len(df)
+        assert info[path][sheet]["columns"] == list(df.columns)
+    # Parsed sheets additionally report their dtypes
+    assert ep.get_sheet_info()[path][sheet]["dtypes"]
+
+def test_memoized_sheets_survive_file_removal(ep, sample_files, tmp_path):
+    path = str(tmp_path / "copy.xlsx")
+    shutil.copy(sample_files[0], path)
+    ep.load_files([path])
+    sheet = ep.first_sheet(path)
+    expected = ep.preview_data(path, sheet, rows=3)
+
+    os.remove(path)
+    pd.testing.assert_frame_equal(ep.preview_data(path, sheet, rows=3), expected)
+    assert ep.refresh() == []
+
+def test_refresh_reloads_changed_files(ep, sample_files, tmp_path):
+    path = str(tmp_path / "book.xlsx")
+    shutil.copy(sample_files[0], path)
+    ep.load_files([path])
+    assert ep.first_sheet(path) == "Sheet1"
+    assert ep.refresh() == []
+
+    shutil.copy(sample_files[1], path)
+    os.utime(path, (0, 0))  # make sure the mtime differs
+    # No stat per access: the old workbook is served until refresh()
+    assert ep.first_sheet(path) == "Sheet1"
+    assert ep.refresh() == [path]
+    assert ep.first_sheet(path) == "Customer Ledger Entries"
+
@@ -1,5 +1,10 @@
+import numpy as np
+import pandas as pd
+import pytest
 from decimal import Decimal
-from src.core.format_parser import FormatParser
+from datetime import date
+from src.core import format_parser
+from src.core.format_parser import FormatParser, _candidate_formats
 
 def test_parse_us_currency():
     assert FormatParser.parse_amount("$1,234.56") == Decimal("1234.56")
@@ -8,4 +13,71 @@ def test_parse_euro_comma():
     assert FormatParser.parse_amount("€1.234,56") == Decimal("1234.56")
 
 def test_parse_excel_date():
-    assert FormatParser.parse_date("44927") == FormatParser.parse_date("2023-01-01")
\ No newline at end of file
+    assert FormatParser.parse_date("44927") == FormatParser.parse_date("2023-01-01")
+
+def test_vectorized_matches_scalar():
+    values = ["$1,234.56", "€1.234,56", "(1,234.56)", "1234.56-", "2.5M"]
+    expected = [FormatParser.parse_amount(v) for v in values]
+    assert list(FormatParser.parse_amount_decimal(pd.Series(values))) == expected
+    parsed = FormatParser.parse_amount_vectorized(pd.Series(values + ["bad"]))
+    assert parsed[:-1] == pytest.approx([float(v) for v in expected])
+    assert np.isnan(parsed[-1])
+
+def test_parse_date_vectorized():
+    parsed = FormatParser.parse_date_vectorized(pd.Series(["2023-12-31", "Q1-24", "bad", None]))
+    assert list(parsed) == [
+        FormatParser.parse_date("2023-12-31"), FormatParser.parse_date("Q1-24"), None, None
+    ]
+
+def test_parse_date_column():
+    parsed = FormatParser.parse_date_column(pd.Series(["31/12/2023", "01/02/2024", None, "bad"]))
+    assert list(parsed[:2]) == [pd.Timestamp("2023-12-31"), pd.Timestamp("2024-02-01")]
+    assert parsed[2:].isna().all()
+
+@pytest.mark.parametrize("shape, expected", [
+    ((True, True, False, False), ("%d/%m/%Y", "%m/%d/%Y")),
+    ((True, False, True, False), ("%Y-%m-%d", "%d-%b-%Y", "%d-%B-%Y", "%d-%b-%y", "%d-%B-%y")),
+    ((True, True, True, False), ("%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d",
+                                 "%d-%b-%Y", "%d-%B-%Y", "%d-%b-%y", "%d-%B-%y")),
+    ((True, False, False, True), ()),
+    ((True, False, False, False), ()),
+    ((False, False, False, True), ("%b %Y", "%B %Y")),
+    ((False, False, True, False), ()),
+    ((False, False, False, False), ()),
+])
+def test_candidate_formats_by_shape(shape, expected):
+    assert _candidate_formats(*shape) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("31/12/2023", date(2023, 12, 31)),
+    ("12/31/2023", date(2023, 12, 31)),
+    ("2023-12-31", date(2023, 12, 31)),
+    ("31-Dec-2023", date(2023, 12, 31)),
+    ("31-December-2023", date(2023, 12, 31)),
+    ("31-Dec-23", date(2023, 12, 31)),
+    ("Dec 2023", date(2023, 12, 1)),
+    ("December 2023", date(2023, 12, 1)),
+    ("Dec\t2023", date(2023, 12, 1)),
+    ("December\u00a02023", date(2023, 12, 1)),
+])
+def test_parse_date_literal_formats(value, expected):
+    assert FormatParser.parse_date(value) == expected
+
+def test_parse_date_any_whitespace_reaches_literal_formats(monkeypatch):
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("fell back to pandas")
+
+    monkeypatch.setattr(format_parser.pd, "to_datetime", no_fallback)
+    for value in ["Dec 2023", "Dec\t2023", "December\u00a02023", "Dec  2023"]:
+        assert FormatParser.parse_date(value) == date(2023, 12, 1)
+
+def test_parse_date_ciso8601(monkeypatch):
+    pytest.importorskip("ciso8601")
+    assert format_parser.ciso8601 is not None
+    values = ["2023-12-31", "2024-02-29", "1999-01-01"]
+    fast = [FormatParser.parse_date(v) for v in values]
+    with pytest.raises(ValueError):
+        FormatParser.parse_date("2023-02-30")
+    monkeypatch.setattr(format_parser, "ciso8601", None)
+    assert fast == [FormatParser.parse_date(v) for v in values]
+    assert fast[1] == date(2024, 2, 29)
@@ -0,0 +1,11 @@
+import numpy as np
+import pandas as pd
+from src.utils.helpers import format_currency, format_currency_series
+
+def test_format_currency_series_matches_scalar():
+    values = pd.Series([1234.5, -987654.321, 0.0, np.nan, -0.004, 1e9])
+    formatted = format_currency_series(values)
+    assert formatted.isna().tolist() == values.isna().tolist()
+    for value, text in zip(values.dropna(), formatted.dropna()):
+        assert text == format_currency(value)
+    assert formatted.iloc[1] == "$-987,654.32"
@@ -0,0 +1,29 @@
+from src.core.excel_processor import ExcelProcessor
+from src.core._prepared import prepared_ledger
+
+LEDGER = "data/sample/Customer_Ledger_Entries_FULL.xlsx"
+
+def test_prepared_ledger_is_cached():
+    ep = ExcelProcessor()
+    ep.load_files([LEDGER], max_rows_hint=50)
+    sheet = ep.first_sheet(LEDGER)
+
+    first = prepared_ledger(ep, LEDGER, sheet, rows=50, columns=["Posting Date", "Amount"])
+    assert list(first.columns) == ["posting_date", "amount", "amount_num"]
+    assert first["amount_num"].notna().all()
+
+    # Mutating the returned frame must not leak into the cached one
+    first["extra"] = 1
+    second = prepared_ledger(ep, LEDGER, sheet, rows=50, columns=["Posting Date", "Amount"])
+    assert "extra" not in second.columns
+
+def test_prepared_ledger_follows_reloads():
+    ep = ExcelProcessor()
+    ep.load_files([LEDGER], max_rows_hint=50)
+    sheet = ep.first_sheet(LEDGER)
+    columns = ["Posting Date", "Amount"]
+    assert len(prepared_ledger(ep, LEDGER, sheet, rows=500, columns=columns)) <= 50
+
+    # Same unchanged file, reloaded without the row hint
+    ep.load_files([LEDGER])
+    assert len(prepared_ledger(ep, LEDGER, sheet, rows=500, columns=columns)) > 50
@@ -1,4 +1,6 @@
 import pandas as pd
+import pytest
+from src.core import type_detector
 from src.core.type_detector import TypeDetector
 
 def test_detect_string():
@@ -14,4 +16,64 @@ def test_detect_number():
 def test_detect_date():
     series = pd.Series(["2023-12-31", "2024-01-01", None])
     dtype, conf = TypeDetector.detect(series)
-    assert dtype == "datetime"
\ No newline at end of file
+    assert dtype == "datetime"
+
+
+def test_detect_native_dtypes():
+    assert TypeDetector.detect(pd.Series([1.5, 2.0, None])) == ("number", 1.0)
+    assert TypeDetector.detect(pd.to_datetime(pd.Series(["2023-12-31", None]))) == ("datetime", 1.0)
+
+
+def test_detect_compact_integer_dates():
+    series = pd.Series([20231231, 20240101, 20240215])
+    assert TypeDetector.detect(series) == ("datetime", 1.0)
+    assert TypeDetector.detect(pd.Series([1, 25, 300])) == ("number", 1.0)
+
+
+@pytest.mark.parametrize("value, is_number", [
+    # Decimal() accepted these before the to_numeric fast path
+    ("nan", True), ("NaN", True), ("sNaN", True), ("1_000", True),
+    ("1e400", True), ("١٢٣", True),
+    ("1.2K", True), ("(1,234.50)", True), ("$ 5", True), ("inf", True),
+    ("abc", False), ("INV-001", False), ("1.2.3", False), ("N/A", False), ("-", False),
+])
+def test_number_classification_matches_decimal(value, is_number):
+    assert TypeDetector._try_number(pd.Series([value])) == (is_number, float(is_number))
+
+
+def test_arrow_and_pandas_trials_agree(monkeypatch):
+    pytest.importorskip("pyarrow")
+    dates = pd.date_range("2023-01-01", periods=60, freq="D")
+    columns = {
+        "iso": pd.Series(dates.strftime("%Y-%m-%d")),
+        "european": pd.Series(dates.strftime("%d.%m.%Y")),
+        "us_time": pd.Series(dates.strftime("%m/%d/%Y %H:%M")),
+        # 2 of 60 values unparseable: still a date column, confidence < 1
+        "some_bad": pd.Series(list(dates.strftime("%d/%m/%Y")[:58]) + ["n/a", "31/02/2023"]),
+        "mostly_bad": pd.Series(list(dates.strftime("%Y-%m-%d")[:30]) + ["pending"] * 30),
+        "text": pd.Series(["abc", "def"] * 30),
+    }
+    with_arrow = TypeDetector.detect_all(pd.DataFrame(columns))
+    monkeypatch.setattr(type_detector, "pa", None)
+    with_pandas = TypeDetector.detect_all(pd.DataFrame(columns))
+    assert with_arrow == with_pandas
+    assert with_arrow["some_bad"] == ("datetime", 58 / 60)
+
+
+def test_detect_date_beyond_sample():
+    n = TypeDetector.SAMPLE_SIZE * 4
+    values = list(pd.date_range("2020-01-01", periods=n, freq="D").strftime("%d/%m/%Y"))
+    values[::100] = ["unknown"] * len(values[::100])
+    dtype, conf = TypeDetector.detect(pd.Series(values))
+    # Confidence is measured on the whole column, not on the sample
+    assert dtype == "datetime"
+    assert conf == pytest.approx(1 - len(values[::100]) / n)
+
+
+def test_probe_rejects_format_but_detection_succeeds():
+    values = pd.Series(["31.12.2023 14:05:00", "01.01.2024 09:30:15", "15.02.2024 23:59:59"])
+    # The date-only probe must not accept values with a time part ...
+    assert not values.str.fullmatch(type_detector._format_probe("%d.%m.%Y")).any()
+    assert values.str.fullmatch(type_detector._format_probe("%d.%m.%Y %H:%M:%S")).all()
+    # ... and the trials still find the full format
+    assert TypeDetector.detect(values) == ("datetime", 1.0)